@@ -0,0 +1,145 @@
+import contextvars
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import http_client
+from cache_store import TieredCache
+from geocoding import normalize_name
+from rate_limiter import SingleFlight
+
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search.json")
+ATTRACTIONS_CACHE_TTL = 7 * 86400
+ATTRACTIONS_LIMIT = 15
+
+# Each variant is one paid SerpApi call; together they cover more than the
+# single "top attractions" page, and agreement between them drives ranking.
+QUERY_VARIANTS = {
+    "attractions": "Top tourist attractions in {destination}",
+    "museums": "Best museums in {destination}",
+    "outdoor": "Best parks and outdoor activities in {destination}",
+    "neighborhoods": "Best neighborhoods to explore in {destination}",
+}
+TRACKING_PARAMS = {"gclid", "fbclid", "hl", "gl", "ref", "sa", "ved", "usg"}
+TRUSTED_DOMAINS = {
+    "tripadvisor.com": 0.15,
+    "wikipedia.org": 0.1,
+    "lonelyplanet.com": 0.1,
+    "timeout.com": 0.05,
+    "atlasobscura.com": 0.05,
+}
+RANK_OFFSET = 10
+TITLE_SIMILARITY = 0.85
+
+attractions_cache = TieredCache("attractions", default_ttl=ATTRACTIONS_CACHE_TTL)
+_executor = ThreadPoolExecutor(max_workers=len(QUERY_VARIANTS), thread_name_prefix="serpapi")
+_flights = SingleFlight("attractions")
+
+
+def serpapi_search(query):
+    params = {"engine": "google", "q": query, "api_key": os.getenv("SERP_API_KEY")}
+    data = http_client.get(SERPAPI_URL, params=params, upstream="serpapi").json()
+    if "error" in data:
+        raise RuntimeError(data["error"])
+    return data.get("organic_results", [])
+
+
+def canonical_url(link):
+    parts = urlsplit(link.strip())
+    host = (parts.hostname or "").lower()
+    host = re.sub(r"^(www\d?|m)\.", "", host)
+    path = re.sub(r"/+$", "", parts.path) or ""
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")]
+    return f"{host}{path}" + (f"?{urlencode(sorted(query))}" if query else "")
+
+
+def normalize_title(title):
+    # "Louvre Museum - Tripadvisor" and "Louvre Museum | Paris" are the same page.
+    title = re.split(r"\s+[-|–—:]\s+", title)[0]
+    return normalize_name(title)
+
+
+def domain_boost(link):
+    host = (urlsplit(link).hostname or "").lower()
+    for domain, boost in TRUSTED_DOMAINS.items():
+        if host == domain or host.endswith("." + domain):
+            return boost
+    return 0.0
+
+
+def merge_results(results_by_variant):
+    # Deduplicates by canonical URL first, then by title similarity among
+    # titles that share a first word, and scores each survivor with
+    # reciprocal-rank fusion across the variants it appeared in.
+    merged = []
+    by_url = {}
+    by_first_word = {}
+    for variant, results in results_by_variant.items():
+        for position, result in enumerate(results):
+            title, link = result.get("title"), result.get("link")
+            if not title or not link:
+                continue
+            url_key = canonical_url(link)
+            title_key = normalize_title(title)
+            entry = by_url.get(url_key)
+            if entry is None:
+                for candidate in by_first_word.get(title_key.split(" ")[0], []):
+                    if SequenceMatcher(None, title_key, candidate["title_key"]).ratio() >= TITLE_SIMILARITY:
+                        entry = candidate
+                        break
+            if entry is None:
+                entry = {
+                    "title": title,
+                    "link": link,
+                    "snippet": result.get("snippet", ""),
+                    "title_key": title_key,
+                    "variants": [],
+                    "score": domain_boost(link),
+                }
+                merged.append(entry)
+                by_first_word.setdefault(title_key.split(" ")[0], []).append(entry)
+            by_url.setdefault(url_key, entry)
+            if variant not in entry["variants"]:
+                entry["variants"].append(variant)
+                entry["score"] += 1.0 / (RANK_OFFSET + position + 1)
+
+    merged.sort(key=lambda entry: entry["score"], reverse=True)
+    for entry in merged:
+        del entry["title_key"]
+        entry["score"] = round(entry["score"], 4)
+    return merged
+
+
+def search_attractions(destination, search=serpapi_search, limit=ATTRACTIONS_LIMIT):
+    key = normalize_name(destination)
+    merged = attractions_cache.get(key)
+    if merged is None:
+        # Everyone asking about the same place at once shares one set of searches.
+        merged = _flights.do((key, search), lambda: search_all(destination, key, search))
+    return merged[:limit]
+
+
+def cached_attractions(destination):
+    # Never searches; None until a search for the destination has finished.
+    return attractions_cache.get(normalize_name(destination))
+
+
+def search_all(destination, key, search):
+    # Each call runs in a copy of this context, so the rate limiter still
+    # sees which section it is for.
+    futures = {variant: _executor.submit(contextvars.copy_context().run, search, query.format(destination=destination)) for variant, query in QUERY_VARIANTS.items()}
+    results_by_variant, errors = {}, []
+    for variant, future in futures.items():
+        try:
+            results_by_variant[variant] = future.result()
+        except Exception as e:
+            errors.append(e)
+    if not results_by_variant:
+        raise errors[0]
+
+    merged = merge_results(results_by_variant)
+    # A partial result is still useful, but shouldn't stick around for a week.
+    attractions_cache.set(key, merged, ATTRACTIONS_CACHE_TTL if not errors else 3600)
+    return merged
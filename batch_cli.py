@@ -0,0 +1,147 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cache_store import cache_key
+from travel_engine import SECTION_KEYS, generate_plan
+
+# Flights need codes per traveller and the map is only a geocode, so neither
+# is worth pre-generating.
+DEFAULT_BATCH_SECTIONS = [key for key in SECTION_KEYS if key not in ("flights", "map")]
+
+
+def parse_sections(value):
+    if not value:
+        return DEFAULT_BATCH_SECTIONS
+    if isinstance(value, str):
+        value = [key.strip() for key in value.replace("|", ",").split(",")]
+    unknown = [key for key in value if key and key not in SECTION_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)}")
+    return [key for key in SECTION_KEYS if key in value]
+
+
+def normalize_row(row):
+    destination = (row.get("destination") or "").strip()
+    if not destination:
+        raise ValueError("Missing destination")
+    return {
+        "destination": destination,
+        "num_days": int(row.get("num_days") or 5),
+        "budget": (row.get("budget") or "Mid").strip(),
+        "currency": (row.get("currency") or "USD").strip().upper(),
+        "sections": parse_sections(row.get("sections")),
+    }
+
+
+def row_id(row):
+    return cache_key(row["destination"].casefold(), row["num_days"], row["budget"].casefold(), row["currency"], row["sections"])
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return rows
+
+
+def completed_ids(path):
+    # Rows that already have a successful result are skipped on the next run;
+    # failed rows are written too, but get retried.
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash mid-write.
+                continue
+            if "error" not in record:
+                done.add(record["id"])
+    return done
+
+
+class Checkpoint:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def run_row(row, combined):
+    started = time.perf_counter()
+    record = {"id": row_id(row), **row}
+    try:
+        record["results"], outcomes = generate_plan(row["destination"], row["num_days"], row["budget"], row["currency"], row["sections"], combined)
+    except Exception as e:
+        record["error"] = str(e)
+    else:
+        # Sections report failures as text, so a plan rarely raises; any
+        # failed or timed-out section makes the row an error to retry.
+        failed = [f"{key} ({outcome})" for key, outcome in outcomes.items() if outcome != "ok"]
+        if failed:
+            record["error"] = f"Failed sections: {', '.join(failed)}"
+    record["elapsed"] = round(time.perf_counter() - started, 3)
+    record["generated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate travel plans in bulk, e.g. to pre-warm the response caches.")
+    parser.add_argument("input", help="JSONL or CSV file with destination, num_days, budget, currency and sections columns")
+    parser.add_argument("-o", "--output", default="plans.jsonl", help="JSONL file to append results to (default: plans.jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="plans generated at the same time (default: 4)")
+    parser.add_argument("--combined", action="store_true", help="generate the LLM sections of each plan in one request")
+    args = parser.parse_args(argv)
+
+    rows, skipped = [], 0
+    done = completed_ids(args.output)
+    for line_number, raw in enumerate(read_rows(args.input), 1):
+        try:
+            row = normalize_row(raw)
+        except ValueError as e:
+            print(f"Skipping row {line_number}: {e}", file=sys.stderr)
+            continue
+        if row_id(row) in done:
+            skipped += 1
+            continue
+        done.add(row_id(row))
+        rows.append(row)
+
+    print(f"{len(rows)} plans to generate, {skipped} already done.")
+    checkpoint = Checkpoint(args.output)
+    failures = 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(run_row, row, args.combined) for row in rows]
+            for count, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                checkpoint.write(record)
+                status = f"failed: {record['error']}" if "error" in record else f"{record['elapsed']:.1f}s"
+                failures += "error" in record
+                print(f"[{count}/{len(rows)}] {record['destination']} ({record['num_days']} days, {record['budget']}): {status}")
+    finally:
+        checkpoint.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the benchmark from reading or polluting the real response cache.
+os.environ["TRAVEL_CACHE_DB"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+
+import openai
+
+from combined_generation import CombinedGeneration
+from fake_services import fake_openai
+from llm_cache import prompt_cache
+from section_executor import Section, run_sections
+
+DESTINATION, NUM_DAYS, BUDGET = "Lisbon", 5, "Mid"
+
+# The prompts the per-section fetchers send today.
+SECTION_PROMPTS = {
+    "transport": (f"Provide public transport and taxi options in {DESTINATION}.", "gpt-4o-mini"),
+    "accommodation": (f"List best {BUDGET}-budget hotels and stays in {DESTINATION}.", "gpt-4o-mini"),
+    "shopping": (f"Provide famous shopping places and souvenirs in {DESTINATION}.", "gpt-4o-mini"),
+    "packing_list": (f"Generate a packing list for a {NUM_DAYS}-day trip to {DESTINATION} considering weather and activities.", "gpt-4o-mini"),
+    "local_phrases": (f"Provide essential travel phrases in the local language of {DESTINATION}.", "gpt-4o-mini"),
+    "emergency_info": (f"List emergency contacts (hospitals, embassies, police) in {DESTINATION}.", "gpt-4-turbo"),
+}
+
+
+class UsageCounter:
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.requests = 0
+
+    def add(self, usage):
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        self.requests += 1
+
+    def __str__(self):
+        total = self.prompt_tokens + self.completion_tokens
+        return f"{self.requests} requests, {self.prompt_tokens} prompt + {self.completion_tokens} completion = {total} tokens"
+
+
+def per_section(client, counter):
+    def fetch(prompt, model):
+        response = client.chat.completions.create(model=model, messages=[{"role": "user", "content": prompt}])
+        counter.add(response.usage)
+        return response.choices[0].message.content
+
+    sections = [Section(key, key, fetch, prompt, model) for key, (prompt, model) in SECTION_PROMPTS.items()]
+    return dict(run_sections(sections))
+
+
+def combined(client, counter):
+    def fallback(key):
+        return lambda: f"fallback for {key}"
+
+    generation = CombinedGeneration(client, DESTINATION, list(SECTION_PROMPTS), NUM_DAYS, BUDGET,
+                                    {key: fallback(key) for key in SECTION_PROMPTS})
+    sections = [Section(key, key, generation.get, key) for key in SECTION_PROMPTS]
+    results = dict(run_sections(sections))
+    if generation.usage:
+        counter.add(generation.usage)
+    return results, generation.error
+
+
+def main():
+    # Request overhead dominates short answers, so model it explicitly.
+    with fake_openai(first_token_delay=0.6, token_delay=0.004, words=120) as server:
+        client = openai.OpenAI(base_url=f"{server.url}/v1", api_key="fake")
+
+        counter = UsageCounter()
+        started = time.perf_counter()
+        per_section(client, counter)
+        print(f"per-section (concurrent): {time.perf_counter() - started:.2f}s, {counter}")
+
+        counter = UsageCounter()
+        started = time.perf_counter()
+        results, error = combined(client, counter)
+        print(f"combined:                 {time.perf_counter() - started:.2f}s, {counter}")
+        assert error is None and len(results) == len(SECTION_PROMPTS)
+
+    prompt_cache.clear()
+    with fake_openai(first_token_delay=0.1, token_delay=0.0, malformed_json=True) as server:
+        client = openai.OpenAI(base_url=f"{server.url}/v1", api_key="fake")
+        results, error = combined(client, UsageCounter())
+        print(f"malformed output:         {type(error).__name__}, {sum(text.startswith('fallback') for text in results.values())}/{len(results)} sections fell back")
+
+
+if __name__ == "__main__":
+    main()
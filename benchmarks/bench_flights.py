@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_services import fake_aviationstack
+
+# One trip with several legs.
+CODES = ["AI101", "AI102", "BA142", "BA143", "LH760"]
+
+
+def main():
+    with fake_aviationstack(flights=CODES, delay=0.1) as server:
+        os.environ["AVIATIONSTACK_API_URL"] = f"{server.url}/v1"
+        os.environ.setdefault("AVIATION_API_KEY", "fake")
+        import flight_tracker
+        import rate_limiter
+
+        # Timing the lookups themselves, not AviationStack's quota.
+        rate_limiter.RATE_LIMITING = False
+        tracker = flight_tracker.FlightTracker(poll_interval=0.5)
+
+        started = time.perf_counter()
+        for code in CODES:
+            tracker.fetch({"flight_iata": code})
+        print(f"sequential lookups:   {len(CODES)} calls, {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        flights = tracker.lookup(CODES)
+        assert all(flights.values())
+        print(f"parallel lookup:      {tracker.api_calls} calls, {time.perf_counter() - started:.2f}s")
+
+        calls = tracker.api_calls
+        started = time.perf_counter()
+        for _ in range(100):
+            tracker.lookup(CODES)
+        print(f"100 cached renders:   {tracker.api_calls - calls} calls, {(time.perf_counter() - started) * 1000:.2f}ms")
+
+        tracker.track(CODES)
+        calls = tracker.api_calls
+        time.sleep(1.2)
+        print(f"poller (1.2s):        {tracker.api_calls - calls} calls in the background")
+        tracker.stop()
+        print(f"fake server saw:      {server.calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must stay out of the startup path; each one is imported
+# only by the section that needs it.
+DEFERRED_MODULES = ["openai", "agno", "folium", "streamlit_folium", "geopy", "numpy", "fpdf"]
+
+SCENARIOS = {
+    "engine import": "import travel_engine",
+    "batch cli import": "import batch_cli",
+    "engine + openai client": "import travel_engine; travel_engine.get_client()",
+}
+
+
+def import_profile(code):
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "profile"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def depth(name):
+    # -X importtime indents nested imports by two spaces per level.
+    return (len(name) - len(name.lstrip(" "))) // 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report startup import cost and catch eager heavy imports.")
+    parser.add_argument("--budget-ms", type=float, default=400.0, help="fail if 'engine import' takes longer (default: 400)")
+    parser.add_argument("--top", type=int, default=8, help="slowest top-level imports to list per scenario")
+    args = parser.parse_args()
+
+    failures = []
+    for scenario, code in SCENARIOS.items():
+        modules = import_profile(code)
+        total_ms = sum(cumulative for name, _, cumulative in modules if depth(name) == 0) / 1000
+        children = sorted(
+            [(name.strip(), cumulative) for name, _, cumulative in modules if depth(name) == 1],
+            key=lambda item: item[1], reverse=True,
+        )
+        loaded = {name.strip().split(".")[0] for name, _, _ in modules}
+        print(f"{scenario}: {total_ms:.1f} ms across {len(modules)} modules")
+        for name, cumulative in children[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+        if scenario == "engine import":
+            eager = [name for name in DEFERRED_MODULES if name in loaded]
+            if eager:
+                failures.append(f"{scenario} eagerly imports {', '.join(eager)}")
+            if total_ms > args.budget_ms:
+                failures.append(f"{scenario} took {total_ms:.1f} ms (budget {args.budget_ms:g} ms)")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+POIS = 250
+CENTER = (48.8566, 2.3522)
+
+
+def fake_stops(count, seed=1):
+    # Attractions cluster around a few neighbourhoods, like real cities.
+    rng = random.Random(seed)
+    hubs = [(CENTER[0] + rng.uniform(-0.08, 0.08), CENTER[1] + rng.uniform(-0.12, 0.12)) for _ in range(8)]
+    stops = []
+    for i in range(count):
+        hub = rng.choice(hubs)
+        stops.append({"name": f"Stop {i}", "link": "", "latitude": hub[0] + rng.gauss(0, 0.01), "longitude": hub[1] + rng.gauss(0, 0.015)})
+    return stops
+
+
+def main():
+    import numpy as np
+
+    from itinerary import haversine_matrix, order_stops, plan_days
+
+    stops = fake_stops(POIS)
+    plan_days(stops[:10], 2, CENTER)
+
+    for num_days in (1, 3, 7, 14, 30):
+        started = time.perf_counter()
+        days, _ = plan_days(stops, num_days, CENTER)
+        elapsed = time.perf_counter() - started
+        total = sum(day["distance_km"] for day in days)
+        sizes = [len(day["stops"]) for day in days]
+        print(f"{POIS} stops, {num_days:>2} days: {elapsed * 1000:7.1f}ms, {total:7.1f} km walked, {min(sizes)}-{max(sizes)} stops a day")
+
+    # How much the heuristic saves over visiting stops in search-result order.
+    distances = haversine_matrix([stop["latitude"] for stop in stops], [stop["longitude"] for stop in stops])
+    naive = float(distances[np.arange(POIS - 1), np.arange(1, POIS)].sum())
+    started = time.perf_counter()
+    route = order_stops(distances)
+    elapsed = time.perf_counter() - started
+    routed = float(sum(distances[a, b] for a, b in zip(route, route[1:])))
+    print(f"single route over {POIS} stops: {naive:.0f} km in listed order, {routed:.0f} km after nearest neighbour + 2-opt ({elapsed * 1000:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
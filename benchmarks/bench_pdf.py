@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_services import fake_completion_text
+
+DAYS = 30
+BULK_PLANS = 24
+LLM_SECTIONS = ["accommodation", "transport", "emergency_info", "shopping", "packing_list", "local_phrases"]
+
+
+def fake_plan(destination, days=DAYS):
+    from weather_forecast import format_daily_summary
+
+    results = {}
+    for key in LLM_SECTIONS:
+        # Roughly what a long itinerary's answers look like: headings,
+        # bullets with bold lead-ins and a paragraph per day.
+        lines = [f"## {key.replace('_', ' ').title()} in {destination}"]
+        for day in range(days):
+            lines.append(f"- **Day {day + 1}**: {fake_completion_text(f'{key} day {day} in {destination}', 25)}")
+        lines.append("")
+        lines.append(fake_completion_text(f"{key} summary for {destination}", 120))
+        results[key] = "\n".join(lines)
+    weather = [
+        {"date": f"2026-11-{day % 30 + 1:02d}", "temp_min": 8.5, "temp_max": 17.0, "precipitation": 1.4, "pop": 0.35, "wind_max": 4.2, "humidity": 71, "condition": "Clouds"}
+        for day in range(5)
+    ]
+    results["weather"] = format_daily_summary(weather, days)
+    results["exchange_rate"] = "1 EUR = 90.12 INR"
+    results["places"] = "\n".join(f"- [{destination} Sight {i}](https://www.example.com/{i})" for i in range(15))
+    results["map"] = {"address": f"{destination}, France", "latitude": 48.8566, "longitude": 2.3522}
+    return results
+
+
+def main():
+    import pdf_export
+    from travel_engine import SECTION_TITLES
+
+    plan = fake_plan("Paris")
+
+    started = time.perf_counter()
+    data = pdf_export.plan_pdf("Paris", DAYS, "Mid", "EUR", plan, SECTION_TITLES).finish()
+    print(f"first export (fonts parsed): {time.perf_counter() - started:.3f}s, {len(data) / 1024:.0f} KiB")
+
+    runs = 10
+    started = time.perf_counter()
+    for _ in range(runs):
+        data = pdf_export.plan_pdf("Paris", DAYS, "Mid", "EUR", plan, SECTION_TITLES).finish()
+    print(f"warm export ({DAYS} days):     {(time.perf_counter() - started) / runs:.3f}s per plan")
+
+    # Sections arrive over time in the app; only the tail is left at the end.
+    builder = pdf_export.PlanPdf("Paris", DAYS, "Mid", "EUR", [(key, SECTION_TITLES[key]) for key in plan])
+    for key in list(plan)[:-1]:
+        builder.add(key, plan[key])
+    started = time.perf_counter()
+    builder.add("map", plan["map"])
+    data = builder.finish()
+    print(f"after the last section:      {time.perf_counter() - started:.3f}s to finish")
+
+    tracemalloc.start()
+    data = pdf_export.plan_pdf("Paris", DAYS, "Mid", "EUR", plan, SECTION_TITLES).finish()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"peak traced memory:          {peak / 1024 / 1024:.1f} MiB for a {len(data) / 1024:.0f} KiB PDF")
+
+    records = [
+        {"id": f"{i:08x}", "destination": f"City {i}", "num_days": DAYS, "budget": "Mid", "currency": "EUR", "results": fake_plan(f"City {i}")}
+        for i in range(BULK_PLANS)
+    ]
+    with tempfile.TemporaryDirectory() as output_dir:
+        started = time.perf_counter()
+        for record in records:
+            pdf_export.export_record(record, SECTION_TITLES, os.path.join(output_dir, f"serial-{record['id']}.pdf"))
+        serial = time.perf_counter() - started
+        started = time.perf_counter()
+        count = len(list(pdf_export.export_plans(records, output_dir, SECTION_TITLES)))
+        pooled = time.perf_counter() - started
+    print(f"bulk, {BULK_PLANS} plans:              serial {serial:.2f}s, process pool {pooled:.2f}s ({count} files, {os.cpu_count()} CPUs)")
+
+
+if __name__ == "__main__":
+    main()
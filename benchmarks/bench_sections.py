@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from section_executor import Section, run_sections
+
+# Stubbed backends: each "section" just sleeps for a typical upstream latency.
+STUB_LATENCIES = {
+    "accommodation": 1.2,
+    "weather": 0.3,
+    "exchange_rate": 0.2,
+    "transport": 0.9,
+    "emergency_info": 1.6,
+    "shopping": 0.8,
+    "packing_list": 1.0,
+    "local_phrases": 0.7,
+    "map": 0.4,
+}
+
+
+def stub_backend(key, latency):
+    time.sleep(latency)
+    return f"{key} done"
+
+
+def run_sequential(sections):
+    return [section.run() for section in sections]
+
+
+def run_concurrent(sections):
+    results = [None] * len(sections)
+    for i, result in run_sections(sections):
+        results[i] = result
+    return results
+
+
+def main(scale=0.25):
+    sections = [Section(key, key, stub_backend, key, latency * scale) for key, latency in STUB_LATENCIES.items()]
+    total = sum(section.args[1] for section in sections)
+    slowest = max(section.args[1] for section in sections)
+
+    start = time.perf_counter()
+    sequential = run_sequential(sections)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = run_concurrent(sections)
+    concurrent_time = time.perf_counter() - start
+
+    assert sequential == concurrent
+    print(f"sections:          {len(sections)}")
+    print(f"sum of latencies:  {total:.3f}s")
+    print(f"slowest section:   {slowest:.3f}s")
+    print(f"sequential:        {sequential_time:.3f}s")
+    print(f"concurrent:        {concurrent_time:.3f}s ({sequential_time / concurrent_time:.1f}x faster)")
+
+    timeout_sections = [Section("slow", "slow", stub_backend, "slow", 1.0, timeout=0.1)] + sections[:1]
+    start = time.perf_counter()
+    results = dict(run_sections(timeout_sections))
+    print(f"timeout check:     {time.perf_counter() - start:.3f}s -> {results[0]!r}")
+
+    # A busy pool: time spent queued for a thread doesn't count against a
+    # section's timeout, so none of these should time out.
+    queued_sections = [Section(f"queued{i}", "queued", stub_backend, "queued", 0.2, timeout=0.5) for i in range(16)]
+    outcomes = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(run_sections(queued_sections, executor, outcomes))
+    timed_out = sum(outcome == "timeout" for outcome in outcomes.values())
+    print(f"queued check:      {time.perf_counter() - start:.3f}s, {timed_out} of {len(queued_sections)} timed out on 4 threads")
+    assert not timed_out
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.25)
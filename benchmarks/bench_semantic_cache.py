@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# How people actually type destinations: one canonical city, many spellings.
+VARIANTS = {
+    "Paris": ["Paris", "paris", "Paris, France", "paris france", "Paris FR", "PARIS ", "Pari"],
+    "London": ["London", "london", "London, UK", "london uk", "London, United Kingdom", "Londo"],
+    "Tokyo": ["Tokyo", "tokyo", "Tokyo, Japan", "tokyo, japan", "Tokyo Japan"],
+    "New York": ["New York", "new york", "New York, USA", "new york us", "New York City"],
+}
+# Near-identical prompts that must NOT share an answer.
+DIFFERENT = [
+    ("packing_list", "Generate a packing list for a {days}-day trip to {destination} considering weather and activities.", [3, 5, 7]),
+    ("accommodation", "List best {budget}-budget hotels and stays in {destination}.", ["Low", "Mid", "High"]),
+]
+# Each section is asked in slightly different words too, as prompts get
+# tweaked between releases or typed by hand.
+PROMPTS = {
+    "transport": ["Provide public transport and taxi options in {destination}.", "Provide the public transport and taxi options in {destination}"],
+    "shopping": ["Provide famous shopping places and souvenirs in {destination}.", "Provide the famous shopping places and souvenirs in {destination}"],
+    "local_phrases": ["Provide essential travel phrases in the local language of {destination}.", "Provide the essential travel phrases in the local language of {destination}"],
+}
+MODEL = "gpt-4o-mini"
+
+
+class CountingClient:
+    # Stands in for the OpenAI client: numbers its answers, so a reused one
+    # can be traced back to the prompt it was generated for.
+
+    def __init__(self):
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        self.prompts.append(messages[0]["content"])
+        content = f"answer {len(self.prompts)}"
+        usage = SimpleNamespace(prompt_tokens=len(self.prompts[-1].split()), completion_tokens=2)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+
+def run(canonicalize):
+    # Goes through fetch_openai_response, as the sections do; without a
+    # destination it skips canonicalization and only exact prompts match.
+    import llm_cache
+    import travel_engine
+
+    llm_cache.prompt_cache.clear()
+    client = CountingClient()
+    travel_engine.get_client = lambda: client
+
+    def ask(section, prompt, destination):
+        return travel_engine.fetch_openai_response(prompt, MODEL, section, destination=destination if canonicalize else None)
+
+    requests = 0
+    answers = {}
+    for city, spellings in VARIANTS.items():
+        for destination in spellings:
+            for section, templates in PROMPTS.items():
+                for template in templates:
+                    ask(section, template.format(destination=destination), destination)
+                    requests += 1
+            for section, template, values in DIFFERENT:
+                for value in values:
+                    answer = ask(section, template.format(destination=destination, days=value, budget=value), destination)
+                    answers.setdefault((city, section, value), set()).add(answer)
+                    requests += 1
+    # Every (city, section, value) should map to one answer; more than one
+    # value sharing an answer would be a wrong hit.
+    wrong = 0
+    for city in VARIANTS:
+        for section, _, values in DIFFERENT:
+            seen = [answers[(city, section, value)] for value in values]
+            wrong += sum(len(a & b) > 0 for i, a in enumerate(seen) for b in seen[i + 1:])
+    return requests, len(client.prompts), wrong
+
+
+class BudgetEchoClient:
+    # Stands in for the OpenAI client in combined mode: every answer names
+    # the budget its prompt asked for, so a reused answer is easy to spot.
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        self.calls += 1
+        prompt = messages[0]["content"]
+        budget = re.search(r"on a (\w+) budget", prompt).group(1)
+        sections = json.loads(prompt[prompt.index("{"):])["required"]
+        content = json.dumps({key: f"{budget} answer" for key in sections})
+        usage = SimpleNamespace(prompt_tokens=len(prompt.split()), completion_tokens=len(sections) * 2)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+
+def run_combined():
+    # Combined prompts for one place that differ only in budget score far
+    # above the threshold, so they must never share an answer.
+    import llm_cache
+    from combined_generation import CombinedGeneration
+
+    llm_cache.prompt_cache.clear()
+    client = BudgetEchoClient()
+    sections = ["accommodation", "transport", "shopping"]
+    requests = wrong = 0
+    for spellings in VARIANTS.values():
+        for destination in spellings:
+            for budget in ("Low", "Mid", "Luxury"):
+                results = CombinedGeneration(client, destination, sections, 5, budget, {}).results()
+                requests += 1
+                wrong += results["accommodation"] != f"{budget} answer"
+    return requests, client.calls, wrong
+
+
+def main():
+    os.environ.setdefault("TRAVEL_CACHE_DB", os.path.join(tempfile.mkdtemp(), "bench.sqlite"))
+    import metrics
+    import rate_limiter
+
+    from semantic_cache import embed
+
+    # Counting calls, not waiting for OpenAI's quota.
+    rate_limiter.RATE_LIMITING = False
+
+    embed("warm up")
+    for label, canonicalize in (("exact prompt only", False), ("canonical place + semantic", True)):
+        metrics.reset()
+        started = time.perf_counter()
+        requests, calls, wrong = run(canonicalize)
+        elapsed = time.perf_counter() - started
+        results = {}
+        for labels, value in metrics.llm_cache_results.values.items():
+            result = dict(labels)["result"]
+            results[result] = results.get(result, 0) + value
+        print(
+            f"{label:<28} {requests} requests, {calls:>3} LLM calls, hit rate {1 - calls / requests:5.1%} "
+            f"(exact {results.get('exact', 0):g}, semantic {results.get('semantic', 0):g}), "
+            f"{wrong} wrong reuses, {elapsed / requests * 1000:.2f}ms per lookup"
+        )
+
+    requests, calls, wrong = run_combined()
+    print(f"{'combined mode, 3 budgets':<28} {requests} requests, {calls:>3} LLM calls, {wrong} wrong reuses")
+
+
+if __name__ == "__main__":
+    main()
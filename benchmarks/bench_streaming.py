@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openai
+
+from fake_services import fake_openai
+from llm_streaming import collect_stream, stream_completion
+from section_executor import Section
+
+
+def main():
+    with fake_openai(first_token_delay=0.3, token_delay=0.02, words=80) as server:
+        client = openai.OpenAI(base_url=f"{server.url}/v1", api_key="fake")
+        prompt = "Provide public transport and taxi options in Paris."
+
+        started = time.perf_counter()
+        client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": prompt}])
+        blocking = time.perf_counter() - started
+
+        updates = []
+        section = Section("transport", "transport", lambda: collect_stream(stream_completion(client, prompt, "gpt-4o-mini", "transport"), updates.append))
+        text = section.run()
+        timing = section.timings["transport"]
+
+    print(f"blocking call:        first text after {blocking:.2f}s")
+    print(f"streaming call:       first token after {timing['ttft']:.2f}s, done after {timing['total']:.2f}s")
+    print(f"placeholder updates:  {len(updates)} for {len(text.split())} words")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import percentiles, start_fakes
+
+SECTIONS = ["accommodation", "weather", "exchange_rate", "transport", "packing_list", "places", "map"]
+# Upstream calls per destination a limited, coalesced burst of SECTIONS
+# should make however many users there are: one completion per LLM section,
+# one forecast shared by weather and packing_list, one rate table, one
+# search per attractions query variant and at most one geocode.
+EXPECTED_CALLS = {"openai": 3, "openweathermap": 1, "exchangerate-api": 1, "serpapi": 4, "nominatim": 1}
+
+
+def burst(users, destinations, args):
+    # Every user starts at the same instant, like a link shared in a group chat.
+    import metrics
+    from section_executor import run_sections
+    from travel_engine import build_sections
+
+    for cache in metrics.caches.values():
+        cache.clear()
+    metrics.reset()
+    gate = threading.Barrier(users)
+
+    def run(user):
+        gate.wait()
+        started = time.perf_counter()
+        built = build_sections(destinations[user % len(destinations)], 5, "Mid", "EUR", SECTIONS)
+        outcomes = {}
+        for _ in run_sections(built, outcomes=outcomes):
+            pass
+        return time.perf_counter() - started, sum(outcome != "ok" for outcome in outcomes.values())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        results = list(executor.map(run, range(users)))
+    elapsed = time.perf_counter() - started
+    return elapsed, sorted(latency for latency, _ in results), sum(failed for _, failed in results)
+
+
+def fairness(rate):
+    # One section queues twenty calls, then another asks for one: with
+    # round-robin it waits about one token, not the whole backlog.
+    from rate_limiter import Limiter, LocalBucket
+
+    limiter = Limiter("simulated", LocalBucket(rate, 1))
+    limiter.acquire("warmup")
+    waits = {}
+
+    def call(section, delay):
+        time.sleep(delay)
+        started = time.perf_counter()
+        limiter.acquire(section)
+        waits.setdefault(section, []).append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=call, args=("places", 0)) for _ in range(20)]
+    threads.append(threading.Thread(target=call, args=("weather", 0.05)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return max(waits["places"]), waits["weather"][0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fire a burst of identical plans at local fakes, with and without rate limiting and coalescing.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--destinations", default="Paris", help="comma-separated; users are spread over them (default: Paris)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--serpapi-rate-limit", type=float, default=2.0, help="SerpApi quota in calls per second (default: 2)")
+    parser.add_argument("--llm-first-token", type=float, default=0.2)
+    parser.add_argument("--llm-token-delay", type=float, default=0.002)
+    parser.add_argument("--llm-words", type=int, default=60)
+    args = parser.parse_args(argv)
+    destinations = [name.strip() for name in args.destinations.split(",") if name.strip()]
+
+    # The limiter runs a little under the fake's quota, as it would under the
+    # real one: the upstream's clock starts when requests arrive, not when sent.
+    os.environ["RATE_LIMITS"] = f"serpapi={args.serpapi_rate_limit * 0.9:g}:1"
+    fakes = start_fakes(args)
+    import metrics
+    import rate_limiter
+
+    problems = []
+    try:
+        # Limited first: the direct burst trips SerpApi's circuit breaker,
+        # which would otherwise fail the second run before it sends anything.
+        for label, enabled in (("limited + coalesced", True), ("direct calls", False)):
+            rate_limiter.RATE_LIMITING = rate_limiter.COALESCING = enabled
+            before = {name: server.calls for name, server in fakes.items()}
+            elapsed, latencies, failed = burst(args.users, destinations, args)
+            p50, p95, _ = percentiles(latencies)
+            print(f"\n{label}: {args.users} users in {elapsed:.2f}s, plan p50 {p50:.2f}s, p95 {p95:.2f}s, {failed} failed sections")
+            for name, server in fakes.items():
+                after = server.calls
+                diff = {path: count - before[name].get(path, 0) for path, count in after.items() if count != before[name].get(path, 0)}
+                if diff:
+                    print(f"  {name:<18}{diff}")
+                # The direct run is the baseline; only the limited one is held to the limits.
+                if enabled:
+                    calls = sum(count for path, count in diff.items() if path not in ("errors", "rate_limited"))
+                    if diff.get("rate_limited"):
+                        problems.append(f"{name} answered {diff['rate_limited']} calls with 429")
+                    if calls > EXPECTED_CALLS.get(name, 0) * len(destinations):
+                        problems.append(f"{name} got {calls} calls, expected at most {EXPECTED_CALLS.get(name, 0) * len(destinations)}")
+            # With --error-rate, failed sections are the point of the run.
+            if enabled and failed and not args.error_rate:
+                problems.append(f"{failed} sections failed")
+            coalesced = {dict(labels)["name"]: int(value) for labels, value in metrics.coalesced_requests.values.items()}
+            if coalesced:
+                print(f"  coalesced calls:  {coalesced}")
+            for upstream in sorted(dict(labels)["upstream"] for labels in metrics.rate_limit_wait.values):
+                print(f"  {upstream:<18}rate limit wait p95 {metrics.rate_limit_wait.quantile(0.95, upstream=upstream):.2f}s")
+    finally:
+        for server in fakes.values():
+            server.stop()
+
+    backlog, single = fairness(10.0)
+    print(f"\nfairness at 10 calls/s: 20 queued 'places' calls done after {backlog:.2f}s, a later 'weather' call waited {single:.2f}s")
+    # Round-robin lets it in within a couple of tokens, not after the backlog.
+    if single > 0.3:
+        problems.append(f"a single 'weather' call waited {single:.2f}s behind 'places'")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
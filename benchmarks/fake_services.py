@@ -0,0 +1,405 @@
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class FakeServer:
+    # Runs a handler class on 127.0.0.1 in a background thread. Handlers read
+    # their settings from self.server.options and count calls per path.
+    # Every fake also understands latency (s per call), error_rate (share of
+    # calls answered with a 500), rate_limit (calls per second before 429s,
+    # with a burst of rate_limit_burst) and seed.
+
+    def __init__(self, handler, **options):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.options = options
+        self.httpd.calls = {}
+        self.httpd.lock = threading.Lock()
+        self.httpd.random = random.Random(options.get("seed"))
+        self.httpd.bucket = None
+        if options.get("rate_limit"):
+            self.httpd.bucket = TokenBucket(options["rate_limit"], options.get("rate_limit_burst", options["rate_limit"]))
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    @property
+    def calls(self):
+        return dict(self.httpd.calls)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Stream chunks immediately rather than letting Nagle batch them.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def options(self):
+        return self.server.options
+
+    def count(self, name):
+        with self.server.lock:
+            self.server.calls[name] = self.server.calls.get(name, 0) + 1
+
+    def admit(self):
+        # Applies the shared latency, rate limit and error options. Returns
+        # False once it has answered with an error, so the handler just returns.
+        time.sleep(self.options.get("latency", 0))
+        if self.server.bucket is not None and not self.server.bucket.take():
+            self.count("rate_limited")
+            self.send_json({"error": "Too many requests", "message": "Too many requests"}, 429, {"Retry-After": "1"})
+            return False
+        with self.server.lock:
+            failed = self.server.random.random() < self.options.get("error_rate", 0)
+        if failed:
+            self.count("errors")
+            self.send_json({"error": "Injected failure", "message": "Injected failure"}, 500)
+            return False
+        return True
+
+    def query(self):
+        return {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def fake_completion_text(prompt, words):
+    topic = "-".join(prompt.split()[-3:]).rstrip(".")
+    return " ".join(f"{topic}-{i}" for i in range(words))
+
+
+class FakeOpenAIHandler(FakeHandler):
+    # Options: first_token_delay (s), token_delay (s per chunk), words (per
+    # answer or per JSON field), malformed_json (bool).
+
+    def json_answer(self, prompt):
+        if self.options.get("malformed_json"):
+            return '{"transport": "unterminated'
+        schema = json.loads(prompt[prompt.index("{"):])
+        return json.dumps({
+            key: fake_completion_text(field["description"], self.options.get("words", 60))
+            for key, field in schema["properties"].items()
+        })
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json({"error": {"message": "not found"}}, 404)
+            return
+        request = self.read_json()
+        self.count(request.get("model", "unknown"))
+        if not self.admit():
+            return
+        prompt = request["messages"][-1]["content"]
+        if (request.get("response_format") or {}).get("type") == "json_object":
+            content = self.json_answer(prompt)
+        else:
+            content = fake_completion_text(prompt, self.options.get("words", 60))
+        words = content.split(" ")
+        usage = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(words)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        time.sleep(self.options.get("first_token_delay", 0.2))
+
+        if not request.get("stream"):
+            time.sleep(self.options.get("token_delay", 0.01) * len(words))
+            self.send_json({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.options.get("token_delay", 0.01))
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request["model"],
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        if (request.get("stream_options") or {}).get("include_usage"):
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": request["model"], "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def fake_openai(**options):
+    return FakeServer(FakeOpenAIHandler, **options)
+
+
+def fake_flight(code):
+    return {
+        "flight_date": time.strftime("%Y-%m-%d"),
+        "flight_status": "active",
+        "airline": {"name": f"Airline {code[:2]}", "iata": code[:2]},
+        "flight": {"iata": code, "number": code[2:]},
+        "departure": {"airport": f"{code} Origin", "estimated": "2026-01-01T10:00:00+00:00"},
+        "arrival": {"airport": f"{code} Destination", "estimated": "2026-01-01T14:00:00+00:00"},
+    }
+
+
+class FakeAviationStackHandler(FakeHandler):
+    # Options: flights (codes the fake knows about), delay (s per call).
+
+    def do_GET(self):
+        if urlsplit(self.path).path.rstrip("/") != "/v1/flights":
+            self.send_json({"error": {"code": "not_found"}}, 404)
+            return
+        query = self.query()
+        if not query.get("access_key"):
+            self.send_json({"error": {"code": "missing_access_key", "message": "You have not supplied an API Access Key."}}, 401)
+            return
+        if not self.admit():
+            return
+        time.sleep(self.options.get("delay", 0.1))
+        known = self.options.get("flights", [])
+        if "flight_iata" in query:
+            self.count("flight_iata")
+            codes = [code for code in known if code == query["flight_iata"]]
+        else:
+            self.count("all")
+            codes = known[:int(query.get("limit", 100))]
+        data = [fake_flight(code) for code in codes]
+        self.send_json({"pagination": {"limit": 100, "offset": 0, "count": len(data), "total": len(data)}, "data": data})
+
+
+def fake_aviationstack(**options):
+    return FakeServer(FakeAviationStackHandler, **options)
+
+
+def fake_coordinates(name):
+    # Stable, plausible coordinates for any place name. "Sight, City" lands
+    # within a few kilometres of "City".
+    if "," in name:
+        sight, city = name.rsplit(",", 1)
+        latitude, longitude = fake_coordinates(city.strip())
+        digest = hashlib.sha256(sight.casefold().encode()).digest()
+        return round(latitude + (digest[0] / 255 - 0.5) * 0.08, 5), round(longitude + (digest[1] / 255 - 0.5) * 0.12, 5)
+    digest = hashlib.sha256(name.casefold().encode()).digest()
+    return round(digest[0] / 255 * 120 - 60, 4), round(digest[1] / 255 * 360 - 180, 4)
+
+
+class FakeOpenWeatherHandler(FakeHandler):
+    # GET /data/2.5/forecast with lat/lon or q: 40 three-hourly readings.
+    # Options: conditions (cycled through the readings).
+
+    def do_GET(self):
+        if not urlsplit(self.path).path.rstrip("/").endswith("/forecast"):
+            self.send_json({"cod": "404", "message": "Internal error"}, 404)
+            return
+        query = self.query()
+        self.count("forecast")
+        if not self.admit():
+            return
+        if "lat" in query and "lon" in query:
+            latitude, longitude = float(query["lat"]), float(query["lon"])
+            name = f"{latitude:.2f},{longitude:.2f}"
+        elif query.get("q"):
+            name = query["q"]
+            latitude, longitude = fake_coordinates(name)
+        else:
+            self.send_json({"cod": "400", "message": "Nothing to geocode"}, 400)
+            return
+
+        conditions = self.options.get("conditions", ["Clear", "Clouds", "Clouds", "Rain"])
+        seed = int(abs(latitude * 100 + longitude * 10))
+        start = int(time.time()) // 10800 * 10800
+        readings = []
+        for i in range(40):
+            temp = 15 + (seed % 15) + 6 * ((i % 8) in (3, 4, 5)) - 3 * ((i % 8) in (0, 7))
+            condition = conditions[(seed + i // 3) % len(conditions)]
+            reading = {
+                "dt": start + i * 10800,
+                "main": {"temp": temp, "temp_min": temp - 1.5, "temp_max": temp + 1.5, "humidity": 40 + (seed + i) % 50},
+                "weather": [{"main": condition, "description": condition.lower()}],
+                "wind": {"speed": round(1 + (seed + i) % 9 * 0.7, 1)},
+                "pop": 0.8 if condition == "Rain" else 0.1,
+            }
+            if condition == "Rain":
+                reading["rain"] = {"3h": 1.2}
+            readings.append(reading)
+        self.send_json({
+            "cod": "200",
+            "cnt": len(readings),
+            "list": readings,
+            "city": {"name": name, "coord": {"lat": latitude, "lon": longitude}, "timezone": 0},
+        })
+
+
+def fake_openweather(**options):
+    return FakeServer(FakeOpenWeatherHandler, **options)
+
+
+FAKE_RATES = {
+    "USD": 1.0, "EUR": 0.92, "GBP": 0.79, "INR": 83.2, "JPY": 151.4, "AUD": 1.52, "CAD": 1.36, "CHF": 0.9,
+    "CNY": 7.23, "SGD": 1.35, "AED": 3.67, "THB": 36.5, "MXN": 16.9, "BRL": 5.05, "ZAR": 18.6, "KRW": 1345.0,
+}
+
+
+class FakeExchangeRateHandler(FakeHandler):
+    # GET /v6/<key>/latest/<base>. Options: rates (USD-based).
+
+    def do_GET(self):
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        if len(parts) != 4 or parts[2] != "latest":
+            self.send_json({"result": "error", "error-type": "unsupported-code"}, 404)
+            return
+        self.count("latest")
+        if not self.admit():
+            return
+        rates = self.options.get("rates", FAKE_RATES)
+        base = parts[3].upper()
+        if base not in rates:
+            self.send_json({"result": "error", "error-type": "unsupported-code"})
+            return
+        self.send_json({
+            "result": "success",
+            "base_code": base,
+            "conversion_rates": {code: round(rate / rates[base], 6) for code, rate in rates.items()},
+        })
+
+
+def fake_exchangerate(**options):
+    return FakeServer(FakeExchangeRateHandler, **options)
+
+
+# Distinct first words, so the merge's title matching keeps them apart.
+FAKE_SIGHTS = ["Cathedral", "Museum", "Market", "Gardens", "Tower", "Bridge", "Palace", "Harbour", "Gallery", "Castle", "Square", "Opera", "Aquarium", "Library", "Theatre", "Observatory", "Cemetery", "Basilica"]
+
+
+class FakeSerpApiHandler(FakeHandler):
+    # GET /search.json?q=... Options: results (per page). Queries about the
+    # same destination overlap, like real searches do, so merging has work.
+
+    def do_GET(self):
+        if not urlsplit(self.path).path.rstrip("/").endswith("/search.json"):
+            self.send_json({"error": "Unsupported endpoint."}, 404)
+            return
+        query = self.query()
+        self.count("search")
+        if not self.admit():
+            return
+        if not query.get("api_key"):
+            self.send_json({"error": "Invalid API key."}, 401)
+            return
+        q = query.get("q", "")
+        destination = q.rsplit(" in ", 1)[-1]
+        slug = destination.casefold().replace(" ", "-")
+        offset = int(hashlib.sha256(q.encode()).hexdigest(), 16) % 8
+        results = []
+        for position, i in enumerate(range(offset, offset + self.options.get("results", 10))):
+            sight = f"{FAKE_SIGHTS[i % len(FAKE_SIGHTS)]}{'' if i < len(FAKE_SIGHTS) else f' {i}'} {destination}"
+            results.append({
+                "position": position + 1,
+                "title": f"{sight} - Travel Guide",
+                "link": f"https://www.example.com/{slug}/sight-{i}?utm_source=serp",
+                "snippet": f"{sight} is one of the best things to do in {destination}.",
+            })
+        self.send_json({"search_metadata": {"status": "Success"}, "organic_results": results})
+
+
+def fake_serpapi(**options):
+    return FakeServer(FakeSerpApiHandler, **options)
+
+
+class FakeNominatimHandler(FakeHandler):
+    # GET /search?q=...&format=json. Names containing "nowhere" aren't found.
+
+    def do_GET(self):
+        if urlsplit(self.path).path.rstrip("/") != "/search":
+            self.send_json({"error": "Unsupported endpoint."}, 404)
+            return
+        query = self.query()
+        self.count("search")
+        if not self.admit():
+            return
+        q = query.get("q", "")
+        if "nowhere" in q.casefold():
+            self.send_json([])
+            return
+        latitude, longitude = fake_coordinates(q)
+        self.send_json([{
+            "place_id": int(hashlib.sha256(q.encode()).hexdigest()[:8], 16),
+            "lat": str(latitude),
+            "lon": str(longitude),
+            "display_name": f"{q}, Fakeland",
+            "class": "place",
+            "type": "city",
+            "importance": 0.5,
+            "boundingbox": [str(latitude - 0.1), str(latitude + 0.1), str(longitude - 0.1), str(longitude + 0.1)],
+        }])
+
+
+def fake_nominatim(**options):
+    return FakeServer(FakeNominatimHandler, **options)
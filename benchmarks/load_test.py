@@ -0,0 +1,190 @@
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_services import fake_aviationstack, fake_exchangerate, fake_nominatim, fake_openai, fake_openweather, fake_serpapi
+
+FLIGHT_CODES = ["AI101", "AI102", "BA142", "LH760"]
+
+
+def percentiles(values):
+    if not values:
+        return None, None, None
+    if len(values) == 1:
+        return values[0], values[0], values[0]
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def destinations(count, unknown_share):
+    # Real gazetteer cities resolve locally; the rest go through Nominatim.
+    with open(os.path.join(ROOT, "data", "gazetteer.csv"), newline="", encoding="utf-8") as f:
+        cities = [row["name"] for row in csv.DictReader(f)]
+    every = round(1 / unknown_share) if unknown_share else 0
+    names = []
+    for i in range(count):
+        if every and i % every == every - 1:
+            names.append(f"Testville {i}")
+        else:
+            names.append(cities[i % len(cities)])
+    return names
+
+
+def start_fakes(args):
+    common = {"latency": args.latency, "error_rate": args.error_rate, "seed": 7}
+    fakes = {
+        "openai": fake_openai(first_token_delay=args.llm_first_token, token_delay=args.llm_token_delay, words=args.llm_words, **common),
+        "openweathermap": fake_openweather(**common),
+        "exchangerate-api": fake_exchangerate(**common),
+        "aviationstack": fake_aviationstack(flights=FLIGHT_CODES, delay=0, **common),
+        "serpapi": fake_serpapi(rate_limit=args.serpapi_rate_limit, **common),
+        # Public Nominatim allows one request per second.
+        "nominatim": fake_nominatim(rate_limit=1, rate_limit_burst=1, **common),
+    }
+    for server in fakes.values():
+        server.start()
+
+    # Load .env first so it can't point the planner back at the real services.
+    from resources import load_environment
+
+    load_environment()
+    host = fakes["nominatim"].url.split("://", 1)[1]
+    os.environ.update({
+        "OPENAI_BASE_URL": f"{fakes['openai'].url}/v1",
+        "OPENWEATHER_API_URL": f"{fakes['openweathermap'].url}/data/2.5",
+        "EXCHANGE_API_URL": f"{fakes['exchangerate-api'].url}/v6",
+        "AVIATIONSTACK_API_URL": f"{fakes['aviationstack'].url}/v1",
+        "SERPAPI_URL": f"{fakes['serpapi'].url}/search.json",
+        "NOMINATIM_DOMAIN": host,
+        "NOMINATIM_SCHEME": "http",
+        "TRAVEL_CACHE_DB": os.path.join(tempfile.mkdtemp(prefix="travel-load-"), "cache.sqlite"),
+    })
+    for name in ("OPENAI_API_KEY", "SERP_API_KEY", "WEATHER_API_KEY", "EXCHANGE_API_KEY", "AVIATION_API_KEY"):
+        os.environ[name] = "fake"
+    return fakes
+
+
+def run_level(concurrency, names, args):
+    import metrics
+    from section_executor import run_sections
+    from travel_engine import SECTION_KEYS, build_sections
+
+    sections = [key for key in SECTION_KEYS if key not in args.skip]
+    section_latencies = {key: [] for key in sections}
+
+    def run(destination):
+        # What generate_plan does, plus when each section finished.
+        started = time.perf_counter()
+        try:
+            built = build_sections(destination, args.days, "Mid", "EUR", sections, args.combined, ",".join(FLIGHT_CODES))
+            for i, _ in run_sections(built):
+                section_latencies[built[i].key].append(time.perf_counter() - started)
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, e
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(run, names))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    p50, p95, p99 = percentiles(latencies)
+    report = {
+        "concurrency": concurrency,
+        "plans": len(results),
+        "failed_plans": sum(1 for _, error in results if error is not None),
+        "elapsed_s": round(elapsed, 3),
+        "plans_per_s": round(len(results) / elapsed, 3),
+        "plan_p50_s": round(p50, 3),
+        "plan_p95_s": round(p95, 3),
+        "plan_p99_s": round(p99, 3),
+        "sections": {},
+    }
+    for key in sections:
+        p50, p95, p99 = percentiles(sorted(section_latencies[key]))
+        if p50 is None:
+            continue
+        report["sections"][key] = {
+            "p50_s": round(p50, 3),
+            "p95_s": round(p95, 3),
+            "p99_s": round(p99, 3),
+            "errors": int(metrics.section_results.get(section=key, outcome="error")),
+            "timeouts": int(metrics.section_results.get(section=key, outcome="timeout")),
+        }
+    return report
+
+
+def print_report(report, calls):
+    print(
+        f"\nconcurrency {report['concurrency']:>3}: {report['plans']} plans in {report['elapsed_s']:.2f}s "
+        f"({report['plans_per_s']:.2f}/s), p50 {report['plan_p50_s']:.2f}s, p95 {report['plan_p95_s']:.2f}s, "
+        f"p99 {report['plan_p99_s']:.2f}s, {report['failed_plans']} failed"
+    )
+    print(f"  {'section':<16}{'p50':>8}{'p95':>8}{'p99':>8}{'errors':>8}{'timeouts':>10}")
+    for key, row in report["sections"].items():
+        print(f"  {key:<16}{row['p50_s']:>8.2f}{row['p95_s']:>8.2f}{row['p99_s']:>8.2f}{row['errors']:>8}{row['timeouts']:>10}")
+    print("  upstream calls: " + ", ".join(f"{name} {sum(counts.values())} {counts}" for name, counts in calls.items() if counts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive plan generation against local fakes of every upstream at rising concurrency.")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels (default: 1,4,16)")
+    parser.add_argument("--plans", type=int, default=16, help="plans per level (default: 16)")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="extra latency per upstream call in seconds (default: 0.05)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream calls answered with a 500")
+    parser.add_argument("--serpapi-rate-limit", type=float, default=None, help="SerpApi calls per second before 429s")
+    parser.add_argument("--llm-first-token", type=float, default=0.2)
+    parser.add_argument("--llm-token-delay", type=float, default=0.005)
+    parser.add_argument("--llm-words", type=int, default=80)
+    parser.add_argument("--unknown-share", type=float, default=0.1, help="share of destinations missing from the gazetteer")
+    parser.add_argument("--skip", default="", help="comma-separated sections to leave out")
+    parser.add_argument("--combined", action="store_true", help="generate the LLM sections in one request")
+    parser.add_argument("--warm", action="store_true", help="keep caches between levels instead of starting each one cold")
+    parser.add_argument("--json", help="also write the reports to this file, e.g. for comparing CI runs")
+    args = parser.parse_args(argv)
+    args.skip = [key.strip() for key in args.skip.split(",") if key.strip()]
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    fakes = start_fakes(args)
+    import metrics
+
+    names = destinations(args.plans * len(levels), args.unknown_share)
+    reports = []
+    try:
+        for n, concurrency in enumerate(levels):
+            if not args.warm:
+                for cache in metrics.caches.values():
+                    cache.clear()
+            metrics.reset()
+            before = {name: server.calls for name, server in fakes.items()}
+            report = run_level(concurrency, names[n * args.plans:(n + 1) * args.plans], args)
+            calls = {}
+            for name, server in fakes.items():
+                after = server.calls
+                calls[name] = {path: count - before[name].get(path, 0) for path, count in after.items() if count != before[name].get(path, 0)}
+            report["upstream_calls"] = calls
+            print_report(report, calls)
+            reports.append(report)
+    finally:
+        for server in fakes.values():
+            server.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
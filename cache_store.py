@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+CACHE_DB_PATH = os.getenv("TRAVEL_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "travel_agent.sqlite"))
+
+
+def cache_key(*parts):
+    return hashlib.sha256(json.dumps(parts, separators=(",", ":"), ensure_ascii=False).encode()).hexdigest()
+
+
+class TieredCache:
+    # An in-process LRU in front of a SQLite table. Values must be JSON-serialisable.
+
+    def __init__(self, name, path=CACHE_DB_PATH, memory_entries=512, disk_entries=20000, default_ttl=86400):
+        self.name = name
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.default_ttl = default_ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = None
+        metrics.register_cache(name, self)
+
+    def _connect(self):
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}" '
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(f'CREATE INDEX IF NOT EXISTS "{self.name}_accessed" ON "{self.name}" (accessed_at)')
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+            db = self._connect()
+            row = db.execute(f'SELECT value, expires_at FROM "{self.name}" WHERE key = ?', (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    db.execute(f'DELETE FROM "{self.name}" WHERE key = ?', (key,))
+                    db.commit()
+                self.misses += 1
+                return default
+            db.execute(f'UPDATE "{self.name}" SET accessed_at = ? WHERE key = ?', (now, key))
+            db.commit()
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self.disk_hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            db = self._connect()
+            db.execute(
+                f'INSERT OR REPLACE INTO "{self.name}" (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            self._writes += 1
+            # Trimming the table costs a COUNT(*), so only do it every so often.
+            if self._writes % 100 == 0:
+                self._trim(db, now)
+            db.commit()
+
+    def _trim(self, db, now):
+        db.execute(f'DELETE FROM "{self.name}" WHERE expires_at <= ?', (now,))
+        count = db.execute(f'SELECT COUNT(*) FROM "{self.name}"').fetchone()[0]
+        if count > self.disk_entries:
+            overflow = count - self.disk_entries
+            db.execute(
+                f'DELETE FROM "{self.name}" WHERE key IN '
+                f'(SELECT key FROM "{self.name}" ORDER BY accessed_at LIMIT ?)',
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connect()
+            db.execute(f'DELETE FROM "{self.name}"')
+            db.commit()
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_size": len(self._memory),
+        }
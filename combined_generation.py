@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+
+import metrics
+import rate_limiter
+from llm_cache import cached_completion, section_ttl
+from semantic_cache import canonical_place
+
+COMBINED_MODEL = os.getenv("COMBINED_MODEL", "gpt-4o-mini")
+
+# What each LLM-backed section asks for, phrased to slot into one prompt.
+SECTION_INSTRUCTIONS = {
+    "transport": "public transport and taxi options",
+    "accommodation": "the best {budget}-budget hotels and stays",
+    "shopping": "famous shopping places and souvenirs",
+    "packing_list": "a packing list for a {num_days}-day trip, considering weather and activities",
+    "local_phrases": "essential travel phrases in the local language",
+    "emergency_info": "emergency contacts (hospitals, embassies, police)",
+}
+
+
+class MalformedResponseError(ValueError):
+    pass
+
+
+def build_combined_prompt(destination, sections, num_days, budget):
+    schema = {
+        "type": "object",
+        "properties": {
+            key: {"type": "string", "description": SECTION_INSTRUCTIONS[key].format(num_days=num_days, budget=budget)}
+            for key in sections
+        },
+        "required": list(sections),
+    }
+    return (
+        f"You are planning a {num_days}-day trip to {destination} on a {budget} budget.\n"
+        "Reply with a single JSON object that matches this JSON schema. Each value is a Markdown "
+        "string answering its description for this destination.\n"
+        f"{json.dumps(schema)}"
+    )
+
+
+def parse_combined_response(text, sections):
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError) as e:
+        raise MalformedResponseError(f"Combined response is not valid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise MalformedResponseError("Combined response is not a JSON object.")
+    # Missing or non-string sections are left out and fetched on their own.
+    return {key: data[key] for key in sections if isinstance(data.get(key), str) and data[key].strip()}
+
+
+class CombinedGeneration:
+    # Shared by every LLM section of one plan: the first section to ask makes
+    # the single combined call, the rest wait for it and read their slice.
+    # Sections the model left out or garbled go through their usual fetcher.
+
+    def __init__(self, client, destination, sections, num_days, budget, fallbacks, model=COMBINED_MODEL):
+        self.client = client
+        self.destination = destination
+        self.sections = [key for key in sections if key in SECTION_INSTRUCTIONS]
+        self.num_days = num_days
+        self.budget = budget
+        self.fallbacks = fallbacks
+        self.model = model
+        self.usage = None
+        self.error = None
+        self._results = None
+        self._lock = threading.Lock()
+
+    def _complete(self, prompt):
+        rate_limiter.acquire("openai")
+        with metrics.span(metrics.llm_duration, model=self.model):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"},
+            )
+        self.usage = response.usage
+        metrics.record_llm_usage(self.model, "combined", response.usage)
+        text = response.choices[0].message.content
+        # Validate before returning so malformed output never reaches the cache.
+        parse_combined_response(text, self.sections)
+        return text
+
+    def results(self):
+        with self._lock:
+            if self._results is None and not self.sections:
+                self._results = {}
+            if self._results is None:
+                # Canonical names share exact hits only: combined prompts that
+                # differ in budget or days are long enough to look near-identical.
+                place = canonical_place(self.destination)
+                prompt = build_combined_prompt(place.name if place else self.destination, self.sections, self.num_days, self.budget)
+                ttl = min(section_ttl(key) for key in self.sections)
+                try:
+                    text = cached_completion(prompt, self.model, "combined", lambda: self._complete(prompt), ttl)
+                    self._results = parse_combined_response(text, self.sections)
+                except Exception as e:
+                    self.error = e
+                    self._results = {}
+            return self._results
+
+    def get(self, key, *args):
+        text = self.results().get(key)
+        if text is None:
+            return self.fallbacks[key](*args)
+        return text
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import http_client
+
+EXCHANGE_API_URL = os.getenv("EXCHANGE_API_URL", "https://v6.exchangerate-api.com/v6")
+EXCHANGE_REFRESH_SECONDS = float(os.getenv("EXCHANGE_REFRESH_SECONDS", "21600"))
+# After a failed refresh nobody tries again for this long; the stale table
+# (or the error, without one) is served meanwhile.
+EXCHANGE_RETRY_SECONDS = float(os.getenv("EXCHANGE_RETRY_SECONDS", "300"))
+SNAPSHOT_BASE = "USD"
+
+
+class ExchangeRateError(Exception):
+    pass
+
+
+def fetch_usd_rates():
+    url = f"{EXCHANGE_API_URL}/{os.getenv('EXCHANGE_API_KEY')}/latest/{SNAPSHOT_BASE}"
+    data = http_client.get(url, upstream="exchangerate-api").json()
+    if data.get("result") != "success":
+        raise ExchangeRateError(data.get("error-type", "Unknown error"))
+    if "conversion_rates" not in data:
+        raise ExchangeRateError("No conversion rates found in API response.")
+    return data["conversion_rates"]
+
+
+class RateTable:
+    # Holds one USD-based snapshot as a float64 array plus a code -> slot
+    # index; every other pair is derived locally as a cross rate.
+
+    def __init__(self, fetch=fetch_usd_rates, refresh_interval=EXCHANGE_REFRESH_SECONDS, retry_interval=EXCHANGE_RETRY_SECONDS):
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.fetches = 0
+        self._snapshot = None
+        self._retry_at = 0.0
+        self._error = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        import numpy as np
+
+        rates = self.fetch()
+        codes = sorted(rates)
+        index = {code: i for i, code in enumerate(codes)}
+        values = np.fromiter((rates[code] for code in codes), dtype=np.float64, count=len(codes))
+        # Swap in a single tuple so readers never see a half-built table.
+        self._snapshot = (index, values, time.monotonic())
+        self.fetches += 1
+
+    def _due(self, snapshot):
+        if time.monotonic() < self._retry_at:
+            return False
+        return snapshot is None or time.monotonic() - snapshot[2] >= self.refresh_interval
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if self._due(snapshot):
+            with self._lock:
+                # Another thread may have refreshed while we waited for the lock.
+                snapshot = self._snapshot
+                if self._due(snapshot):
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        self._error = e
+                        self._retry_at = time.monotonic() + self.retry_interval
+                    snapshot = self._snapshot
+        if snapshot is None:
+            # Keep serving the stale table if we have one.
+            raise self._error
+        return snapshot
+
+    def currencies(self):
+        return sorted(self.snapshot()[0])
+
+    def _slots(self, index, *codes):
+        try:
+            return [index[code.upper()] for code in codes]
+        except KeyError as e:
+            raise KeyError(f"Unknown currency {e.args[0]}") from None
+
+    def rate(self, base, target):
+        index, values, _ = self.snapshot()
+        base_slot, target_slot = self._slots(index, base, target)
+        return float(values[target_slot] / values[base_slot])
+
+    def cross_rates(self, base, targets):
+        index, values, _ = self.snapshot()
+        base_slot, = self._slots(index, base)
+        return values[self._slots(index, *targets)] / values[base_slot]
+
+    def convert_many(self, amounts, base, target):
+        import numpy as np
+
+        return np.asarray(amounts, dtype=np.float64) * self.rate(base, target)
+
+
+rate_table = RateTable()
@@ -0,0 +1,144 @@
+import contextvars
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+
+AVIATIONSTACK_API_URL = os.getenv("AVIATIONSTACK_API_URL", "http://api.aviationstack.com/v1")
+# The poller runs a little more often than entries expire, so renders of
+# tracked flights are always served from memory.
+FLIGHT_CACHE_TTL = float(os.getenv("FLIGHT_CACHE_TTL", "120"))
+FLIGHT_POLL_INTERVAL = float(os.getenv("FLIGHT_POLL_INTERVAL", "90"))
+# Flights nobody has looked at for this long drop out of the poller.
+FLIGHT_TRACK_EXPIRY = float(os.getenv("FLIGHT_TRACK_EXPIRY", "1800"))
+
+FLIGHT_CODE = re.compile(r"^[A-Z0-9]{2}\d{1,4}[A-Z]?$")
+
+
+class FlightLookupError(Exception):
+    pass
+
+
+def parse_flight_codes(value):
+    if isinstance(value, str):
+        value = re.split(r"[\s,;]+", value)
+    codes = []
+    for code in value:
+        code = code.strip().upper().replace(" ", "")
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def fetch_flights(params):
+    access_key = os.getenv("AVIATION_API_KEY")
+    if not access_key:
+        raise FlightLookupError("Missing API Key for AviationStack.")
+    data = http_client.get(f"{AVIATIONSTACK_API_URL}/flights", params={"access_key": access_key, **params}, upstream="aviationstack").json()
+    if "error" in data:
+        raise FlightLookupError(data["error"].get("message") or data["error"].get("code", "Unknown error"))
+    return data.get("data") or []
+
+
+def format_flight(flight):
+    airline = (flight.get("airline") or {}).get("name", "Unknown Airline")
+    status = flight.get("flight_status", "Unknown Status")
+    departure = flight.get("departure") or {}
+    arrival = flight.get("arrival") or {}
+    return (
+        f"✈️ **Flight Status**: {status}  \n"
+        f"🏢 **Airline**: {airline}  \n"
+        f"🛫 **Departure**: {departure.get('airport', 'Unknown Airport')} at {departure.get('estimated', 'N/A')}  \n"
+        f"🛬 **Arrival**: {arrival.get('airport', 'Unknown Airport')} at {arrival.get('estimated', 'N/A')}"
+    )
+
+
+class FlightTracker:
+    # One flight_iata call per code, run in parallel. (An airline_iata page
+    # is 100 arbitrary flights of that airline across days, so it rarely
+    # holds the codes asked for and mostly adds a call.) Results live in
+    # memory for FLIGHT_CACHE_TTL and tracked codes are refreshed by a
+    # background poller.
+
+    def __init__(self, fetch=fetch_flights, ttl=FLIGHT_CACHE_TTL, poll_interval=FLIGHT_POLL_INTERVAL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.api_calls = 0
+        self._cache = {}
+        self._tracked = {}
+        self._lock = threading.Lock()
+        self._poller = None
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="flights")
+
+    def _call(self, params):
+        self.api_calls += 1
+        return self.fetch(params)
+
+    def _fetch_single(self, code):
+        flights = self._call({"flight_iata": code})
+        return {code: flights[0]} if flights else {}
+
+    def refresh(self, codes):
+        found = {}
+        # Context copies carry the caller's section to the rate limiter.
+        for future in [self._executor.submit(contextvars.copy_context().run, self._fetch_single, code) for code in codes]:
+            found.update(future.result())
+
+        now = time.monotonic()
+        with self._lock:
+            for code in codes:
+                self._cache[code] = (now, found.get(code))
+        return {code: found.get(code) for code in codes}
+
+    def cached(self, codes):
+        now = time.monotonic()
+        with self._lock:
+            return {code: self._cache[code][1] for code in codes if code in self._cache and now - self._cache[code][0] < self.ttl}
+
+    def lookup(self, codes):
+        codes = parse_flight_codes(codes)
+        results = self.cached(codes)
+        missing = [code for code in codes if code not in results]
+        if missing:
+            results.update(self.refresh(missing))
+        return {code: results[code] for code in codes}
+
+    def track(self, codes):
+        now = time.monotonic()
+        with self._lock:
+            for code in parse_flight_codes(codes):
+                self._tracked[code] = now
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name="flight-poller", daemon=True)
+                self._poller.start()
+
+    def tracked(self):
+        now = time.monotonic()
+        with self._lock:
+            for code in [code for code, seen in self._tracked.items() if now - seen > FLIGHT_TRACK_EXPIRY]:
+                del self._tracked[code]
+            # Untracked codes can't be served once expired, so drop them.
+            for code in [code for code, (fetched, _) in self._cache.items() if code not in self._tracked and now - fetched >= self.ttl]:
+                del self._cache[code]
+            return list(self._tracked)
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            codes = self.tracked()
+            if codes:
+                try:
+                    self.refresh(codes)
+                except Exception:
+                    # Keep the last good data; the next tick tries again.
+                    pass
+
+    def stop(self):
+        self._stop.set()
+
+
+flight_tracker = FlightTracker()
@@ -0,0 +1,219 @@
+import bisect
+import csv
+import itertools
+import os
+import queue
+import re
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from concurrent.futures import Future
+
+import rate_limiter
+from cache_store import TieredCache
+from resources import get_nominatim
+
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.csv"))
+NOMINATIM_USER_AGENT = os.getenv("NOMINATIM_USER_AGENT", "geoapi")
+# A self-hosted Nominatim or a local stand-in, e.g. "localhost:8080" with scheme "http".
+NOMINATIM_DOMAIN = os.getenv("NOMINATIM_DOMAIN")
+NOMINATIM_SCHEME = os.getenv("NOMINATIM_SCHEME")
+NOMINATIM_MIN_INTERVAL = float(os.getenv("NOMINATIM_MIN_INTERVAL", "1.1"))
+NOMINATIM_TIMEOUT = float(os.getenv("NOMINATIM_TIMEOUT", "10"))
+GEOCODE_CACHE_TTL = 90 * 86400
+GEOCODE_MISS_TTL = 86400
+MIN_PREFIX_LENGTH = 3
+# "Pari" may complete to "Paris", but "Bar" should not become "Barcelona".
+MIN_PREFIX_RATIO = 0.6
+
+# Same attribute names as geopy's Location, so callers can use either.
+Place = namedtuple("Place", "address latitude longitude")
+
+
+def normalize_name(name):
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    return re.sub(r"[^0-9a-z]+", " ", name.casefold()).strip()
+
+
+def explains(words, place):
+    # True when every leftover word is part of the place's address or its
+    # country's initials: "fr", "uk", "usa", "united".
+    place_words = normalize_name(place.address).split()
+    country_words = normalize_name(place.address.split(",")[-1]).split()
+    initials = "".join(word[0] for word in country_words)
+    for word in words:
+        if any(candidate.startswith(word) for candidate in place_words):
+            continue
+        if word in (initials, initials + "a"):
+            continue
+        return False
+    return True
+
+
+class Gazetteer:
+    def __init__(self, rows):
+        self._places = {}
+        for name, country, latitude, longitude, aliases in rows:
+            place = Place(name if name == country else f"{name}, {country}", float(latitude), float(longitude))
+            for alias in [name] + [alias for alias in aliases.split("|") if alias]:
+                # Rows are ordered by popularity, so the first spelling wins.
+                self._places.setdefault(normalize_name(alias), place)
+        self._names = sorted(self._places)
+        self._rank = {name: i for i, name in enumerate(self._places)}
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        if not os.path.exists(path):
+            return cls([])
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            return cls([row for row in reader if len(row) == 5])
+
+    def __len__(self):
+        return len(self._places)
+
+    def places(self):
+        # Each place once, most popular first.
+        return list(dict.fromkeys(self._places.values()))
+
+    def exact(self, name):
+        return self._places.get(name)
+
+    def prefix(self, name):
+        if len(name) < MIN_PREFIX_LENGTH:
+            return None
+        start = bisect.bisect_left(self._names, name)
+        end = bisect.bisect_left(self._names, name + "￿", start)
+        matches = [match for match in self._names[start:end] if len(name) >= MIN_PREFIX_RATIO * len(match)]
+        if not matches:
+            return None
+        return self._places[min(matches, key=self._rank.__getitem__)]
+
+    def lookup(self, query):
+        name = normalize_name(query)
+        if not name:
+            return None
+        place = self.exact(name)
+        if place:
+            return place
+        # "Paris, France" / "Paris FR": try the part before the first comma,
+        # then drop trailing words one at a time. The dropped words must name
+        # the place's country, or "Paris, Texas" would land in France.
+        words = name.split()
+        candidates = [normalize_name(query.split(",")[0])]
+        candidates += [" ".join(words[:n]) for n in range(len(words) - 1, 0, -1)]
+        for candidate in candidates:
+            place = self.exact(candidate)
+            if place and explains(words[len(candidate.split()):], place):
+                return place
+        return self.prefix(name)
+
+
+def nominatim_backend(query):
+    location = get_nominatim(NOMINATIM_USER_AGENT, NOMINATIM_DOMAIN, NOMINATIM_SCHEME).geocode(query, timeout=NOMINATIM_TIMEOUT)
+    if location is None:
+        return None
+    return Place(location.address, location.latitude, location.longitude)
+
+
+class Geocoder:
+    # gazetteer -> persistent cache -> one rate-limited worker for real misses.
+    # The worker serves interactive lookups (the map, the forecast, a
+    # destination's canonical name) before background ones (itinerary
+    # stops), so a long stop list can't push them past their timeout.
+
+    def __init__(self, gazetteer=None, cache=None, backend=nominatim_backend, min_interval=NOMINATIM_MIN_INTERVAL):
+        self.gazetteer = gazetteer if gazetteer is not None else Gazetteer.load()
+        self.cache = cache or TieredCache("geocode", default_ttl=GEOCODE_CACHE_TTL)
+        self.backend = backend
+        self.min_interval = min_interval
+        self.gazetteer_hits = 0
+        self.remote_calls = 0
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._worker = None
+        self._next_call = 0.0
+
+    def lookup_local(self, query, use_gazetteer=True):
+        # Returns (found, place); place is None for a cached "no such place".
+        # Points of interest skip the gazetteer, whose trailing-word fallback
+        # would place "Rome Colosseum" at the centre of Rome.
+        place = self.gazetteer.lookup(query) if use_gazetteer else None
+        if place:
+            self.gazetteer_hits += 1
+            return True, place
+        cached = self.cache.get(normalize_name(query))
+        if cached is None:
+            return False, None
+        return True, Place(**cached) if cached else None
+
+    def submit(self, query, background=False):
+        key = normalize_name(query)
+        priority = 1 if background else 0
+        # The worker thread queues for Nominatim tokens on the caller's behalf.
+        section = rate_limiter.current_section.get()
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None or priority < pending[1]:
+                # A background lookup asked for interactively is queued again
+                # up front; whichever entry the worker reaches second is skipped.
+                future = pending[0] if pending else Future()
+                self._pending[key] = (future, priority)
+                self._queue.put((priority, next(self._order), query, key, future, section))
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="geocoder", daemon=True)
+                    self._worker.start()
+            return self._pending[key][0]
+
+    def _run(self):
+        while True:
+            _, _, query, key, future, section = self._queue.get()
+            if future.done():
+                continue
+            delay = self._next_call - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                # Shared with other processes when RATE_LIMIT_SHARED is set.
+                rate_limiter.acquire("nominatim", section)
+                self.remote_calls += 1
+                place = self.backend(query)
+                if place:
+                    self.cache.set(key, place._asdict(), GEOCODE_CACHE_TTL)
+                else:
+                    self.cache.set(key, False, GEOCODE_MISS_TTL)
+                future.set_result(place)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._next_call = time.monotonic() + self.min_interval
+                with self._lock:
+                    self._pending.pop(key, None)
+
+    def geocode(self, query, timeout=NOMINATIM_TIMEOUT):
+        if not query or not query.strip():
+            return None
+        found, place = self.lookup_local(query)
+        if found:
+            return place
+        try:
+            return self.submit(query).result(timeout=timeout)
+        except Exception:
+            # Offline, rate limited or timed out: the map is optional.
+            return None
+
+    def geocode_cached(self, query):
+        # Never blocks on the network; misses are resolved in the background
+        # so a later rerun finds them in the cache.
+        found, place = self.lookup_local(query)
+        if not found:
+            self.submit(query, background=True)
+        return place
+
+
+geocoder = Geocoder()
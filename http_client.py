@@ -0,0 +1,156 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+import rate_limiter
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+BACKOFF_CAP = float(os.getenv("HTTP_BACKOFF_CAP", "4"))
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "16"))
+POOL_MAXSIZE_PER_HOST = int(os.getenv("HTTP_POOL_MAXSIZE_PER_HOST", "8"))
+BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "30"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    # closed -> open after BREAKER_FAILURES consecutive failures; after the
+    # cooldown a single trial request is let through (half-open).
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.consecutive_failures >= self.failures:
+                self.opened_at = time.monotonic()
+
+
+_session = requests.Session()
+# pool_maxsize bounds the keep-alive connections per host; pool_block makes
+# extra callers wait for a free connection instead of opening throwaway ones.
+_adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE_PER_HOST, pool_block=True)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream):
+    with _breakers_lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker()
+        return _breakers[upstream]
+
+
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), BACKOFF_CAP)
+        except ValueError:
+            pass
+    # "Full jitter": a random delay up to the exponential ceiling.
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def request(method, url, upstream=None, timeout=None, retries=MAX_RETRIES, **kwargs):
+    upstream = upstream or urlsplit(url).hostname
+    breaker = get_breaker(upstream)
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+    for attempt in range(retries + 1):
+        # The breaker is checked first, so calls it rejects don't wait for
+        # (or use up) rate-limit tokens. Retries queue for a token too.
+        if not breaker.allow():
+            metrics.upstream_failures.inc(upstream=upstream, reason="circuit_open")
+            raise CircuitOpenError(f"{upstream} is unavailable, retrying in {breaker.cooldown:g}s.")
+        rate_limiter.acquire(upstream)
+        started = time.perf_counter()
+        try:
+            response = _session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            reason = "timeout" if isinstance(e, requests.exceptions.Timeout) else "connection"
+            metrics.http_duration.observe(time.perf_counter() - started, upstream=upstream)
+            metrics.http_requests.inc(upstream=upstream, status=reason)
+            metrics.upstream_failures.inc(upstream=upstream, reason=reason)
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        except Exception:
+            # Anything else (bad chunked encoding, too many redirects) isn't
+            # worth retrying, but must still settle a half-open trial.
+            metrics.http_duration.observe(time.perf_counter() - started, upstream=upstream)
+            metrics.http_requests.inc(upstream=upstream, status="error")
+            metrics.upstream_failures.inc(upstream=upstream, reason="error")
+            breaker.record_failure()
+            raise
+
+        metrics.http_duration.observe(time.perf_counter() - started, upstream=upstream)
+        metrics.http_requests.inc(upstream=upstream, status=str(response.status_code))
+        if response.status_code not in RETRY_STATUSES:
+            breaker.record_success()
+            return response
+        metrics.upstream_failures.inc(upstream=upstream, reason=str(response.status_code))
+        breaker.record_failure()
+        if attempt == retries:
+            return response
+        response.close()
+        time.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+
+
+_flights = rate_limiter.SingleFlight("http")
+
+
+def get(url, params=None, **kwargs):
+    # Identical GETs in flight at the same time (fifty sessions asking for
+    # the same forecast) share one request and its response.
+    key = (url, repr(params), repr(sorted(kwargs.items())))
+    return _flights.do(key, lambda: request("GET", url, params=params, **kwargs))
@@ -0,0 +1,233 @@
+import math
+import os
+import re
+
+from geocoding import geocoder
+
+EARTH_RADIUS_KM = 6371.0088
+# Geocoder matches further than this from the destination are almost always
+# a namesake somewhere else ("Central Park" in another city).
+MAX_STOP_DISTANCE_KM = float(os.getenv("ITINERARY_MAX_STOP_DISTANCE_KM", "60"))
+KMEANS_ITERATIONS = 50
+# A day may take this much more than an even share of the stops, so dense
+# neighbourhoods don't turn into one 40-stop day.
+DAY_BALANCE_SLACK = 1.25
+# Stops one rerun may queue for geocoding; the rest wait for a later rerun,
+# so a long search result can't monopolise the Nominatim worker.
+ITINERARY_MAX_PENDING = int(os.getenv("ITINERARY_MAX_PENDING", "10"))
+TWO_OPT_ITERATIONS = 2000
+# folium.Icon only knows a fixed set of marker colours.
+DAY_COLORS = ["red", "blue", "green", "purple", "orange", "darkred", "cadetblue", "darkgreen", "darkblue", "pink", "darkpurple", "gray", "black", "lightred", "beige", "lightblue", "lightgreen"]
+
+
+def stop_name(title):
+    # "Louvre Museum - Tripadvisor" -> "Louvre Museum"
+    return re.split(r"\s+[-|–—:]\s+", title)[0].strip()
+
+
+def haversine_matrix(latitudes, longitudes, other_latitudes=None, other_longitudes=None):
+    import numpy as np
+
+    lat1 = np.radians(np.asarray(latitudes, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(longitudes, dtype=np.float64))[:, None]
+    lat2 = lat1.T if other_latitudes is None else np.radians(np.asarray(other_latitudes, dtype=np.float64))[None, :]
+    lon2 = lon1.T if other_longitudes is None else np.radians(np.asarray(other_longitudes, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def kmeans(points, k, iterations=KMEANS_ITERATIONS, seed=0):
+    # Plain Lloyd's algorithm with k-means++ seeding on unit vectors, so
+    # clusters never split across the antimeridian. Returns a label per
+    # point and the cluster centres.
+    import numpy as np
+
+    n = len(points)
+    if k >= n:
+        return np.arange(n), points.copy()
+    rng = np.random.default_rng(seed)
+    centers = [points[rng.integers(n)]]
+    closest = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = closest.sum()
+        index = rng.choice(n, p=closest / total) if total > 0 else rng.integers(n)
+        centers.append(points[index])
+        closest = np.minimum(closest, ((points - points[index]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(iterations):
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, points)
+        empty = counts == 0
+        centers[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            # Re-seed empty clusters with the points furthest from their centre.
+            far = distances[np.arange(n), labels].argsort()[::-1][:empty.sum()]
+            centers[empty] = points[far]
+    return labels, centers
+
+
+def balance(points, centers, capacity):
+    # Greedy capacity-constrained assignment: the closest (point, cluster)
+    # pairs are taken first and full clusters are skipped.
+    import numpy as np
+
+    k = len(centers)
+    distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    labels = np.full(len(points), -1)
+    counts = np.zeros(k, dtype=int)
+    for flat in distances.argsort(axis=None):
+        point, cluster = divmod(int(flat), k)
+        if labels[point] < 0 and counts[cluster] < capacity:
+            labels[point] = cluster
+            counts[cluster] += 1
+    return labels
+
+
+def order_stops(distances):
+    # Open path through every stop: nearest neighbour from the stop furthest
+    # from the rest, then 2-opt. A zero-cost dummy node turns the open path
+    # into a tour, so the tour move below also reverses path ends.
+    import numpy as np
+
+    n = len(distances)
+    if n <= 2:
+        return list(range(n))
+    start = int(distances.sum(axis=1).argmax())
+    path = [start]
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, distances[path[-1]])
+        path.append(int(row.argmin()))
+        visited[path[-1]] = True
+
+    cost = np.zeros((n + 1, n + 1))
+    cost[:n, :n] = distances
+    tour = np.array(path + [n])
+    m = n + 1
+    valid = np.triu(np.ones((m, m), dtype=bool), k=2)
+    valid[0, m - 1] = False
+    for _ in range(TWO_OPT_ITERATIONS):
+        a, b = tour, np.roll(tour, -1)
+        edge = cost[a, b]
+        delta = cost[a[:, None], a[None, :]] + cost[b[:, None], b[None, :]] - edge[:, None] - edge[None, :]
+        delta[~valid] = 0.0
+        i, j = np.unravel_index(delta.argmin(), delta.shape)
+        if delta[i, j] >= -1e-9:
+            break
+        tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1].copy()
+
+    cut = int(np.flatnonzero(tour == n)[0])
+    return [int(stop) for stop in np.concatenate([tour[cut + 1:], tour[:cut]])]
+
+
+def plan_days(stops, num_days, center=None):
+    # stops: dicts with latitude/longitude. Returns one list of stops per day
+    # (fewer days when there are fewer stops) plus the stops left out.
+    import numpy as np
+
+    if not stops:
+        return [], []
+    latitudes = np.array([stop["latitude"] for stop in stops])
+    longitudes = np.array([stop["longitude"] for stop in stops])
+    dropped = []
+    if center is not None:
+        from_center = haversine_matrix(latitudes, longitudes, [center[0]], [center[1]])[:, 0]
+        keep = from_center <= MAX_STOP_DISTANCE_KM
+        dropped = [stop for stop, kept in zip(stops, keep) if not kept]
+        stops = [stop for stop, kept in zip(stops, keep) if kept]
+        latitudes, longitudes = latitudes[keep], longitudes[keep]
+        if not stops:
+            return [], dropped
+
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+    points = np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    k = max(1, min(num_days, len(stops)))
+    labels, centers = kmeans(points, k)
+    if k > 1:
+        labels = balance(points, centers, math.ceil(len(stops) / k * DAY_BALANCE_SLACK))
+    distances = haversine_matrix(latitudes, longitudes)
+
+    days = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        order = order_stops(distances[np.ix_(members, members)])
+        route = [int(members[i]) for i in order]
+        length = float(sum(distances[a, b] for a, b in zip(route, route[1:])))
+        days.append({"stops": [stops[i] for i in route], "distance_km": round(length, 2), "center": points[members].mean(axis=0)})
+
+    # Visit days in a sensible sequence too: sweep clusters by bearing from
+    # the overall centre, so consecutive days are neighbours.
+    middle = points.mean(axis=0)
+    north = np.array([0.0, 0.0, 1.0])
+    east = np.cross(north, middle)
+    north = np.cross(middle, east)
+    days.sort(key=lambda day: np.arctan2(day["center"] @ east, day["center"] @ north))
+    for number, day in enumerate(days, 1):
+        day["day"] = number
+        del day["center"]
+    return days, dropped
+
+
+def locate_attractions(destination, attractions):
+    # Cached lookups only: misses are geocoded in the background and show up
+    # on a later rerun, so this never waits on Nominatim.
+    located, pending = [], []
+    for attraction in attractions:
+        name = stop_name(attraction["title"])
+        query = f"{name}, {destination}"
+        found, place = geocoder.lookup_local(query, use_gazetteer=False)
+        if not found:
+            if len(pending) < ITINERARY_MAX_PENDING:
+                geocoder.submit(query, background=True)
+            pending.append(name)
+        elif place is not None:
+            located.append({"name": name, "link": attraction.get("link", ""), "latitude": place.latitude, "longitude": place.longitude})
+    return located, pending
+
+
+def build_itinerary(destination, num_days, attractions, center=None):
+    located, pending = locate_attractions(destination, attractions)
+    days, dropped = plan_days(located, num_days, center)
+    return {"days": days, "pending": pending, "dropped": [stop["name"] for stop in dropped]}
+
+
+def format_itinerary(itinerary):
+    if not itinerary["days"]:
+        return "No attractions could be placed on the map yet."
+    lines = []
+    for day in itinerary["days"]:
+        lines.append(f"**Day {day['day']}** ({day['distance_km']:.1f} km)")
+        lines += [f"{i}. [{stop['name']}]({stop['link']})" if stop["link"] else f"{i}. {stop['name']}" for i, stop in enumerate(day["stops"], 1)]
+        lines.append("")
+    if itinerary["pending"]:
+        lines.append(f"Still locating {len(itinerary['pending'])} more places; they'll appear on the next refresh.")
+    return "\n".join(lines)
+
+
+def draw_itinerary(folium_map, itinerary):
+    import folium
+
+    bounds = []
+    for day in itinerary["days"]:
+        color = DAY_COLORS[(day["day"] - 1) % len(DAY_COLORS)]
+        points = [(stop["latitude"], stop["longitude"]) for stop in day["stops"]]
+        bounds += points
+        if len(points) > 1:
+            folium.PolyLine(points, color=color, weight=4, opacity=0.8, tooltip=f"Day {day['day']}").add_to(folium_map)
+        for i, stop in enumerate(day["stops"], 1):
+            folium.Marker(
+                [stop["latitude"], stop["longitude"]],
+                tooltip=f"Day {day['day']}, stop {i}: {stop['name']}",
+                icon=folium.Icon(color=color, icon="info-sign"),
+            ).add_to(folium_map)
+    if bounds:
+        folium_map.fit_bounds([[min(p[0] for p in bounds), min(p[1] for p in bounds)], [max(p[0] for p in bounds), max(p[1] for p in bounds)]])
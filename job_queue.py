@@ -0,0 +1,372 @@
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from cache_store import CACHE_DB_PATH, cache_key
+from flight_tracker import FLIGHT_CACHE_TTL
+from geocoding import Place
+from plan_state import SECTION_MAX_AGE
+from travel_engine import SECTION_KEYS, build_sections
+
+JOB_DB_PATH = os.getenv("JOB_DB", CACHE_DB_PATH)
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "32"))
+# A finished section is handed to later jobs with the same inputs for this
+# long, so closing the tab and asking again, or ticking one more section,
+# only runs what is missing. Live sections are reused for less.
+JOB_REUSE_SECONDS = float(os.getenv("JOB_REUSE_SECONDS", "3600"))
+JOB_SECTION_MAX_AGE = {**SECTION_MAX_AGE, "flights": min(SECTION_MAX_AGE["flights"], FLIGHT_CACHE_TTL)}
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 86400)))
+# A stored job still "running" without an update for this long belongs to a
+# process that went away.
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "300"))
+
+# Sections running at once against each upstream, across every job in the
+# process. Override with e.g. JOB_UPSTREAM_LIMITS="openai=4,serpapi=1".
+UPSTREAM_LIMITS = {
+    "openai": 8,
+    "openweathermap": 4,
+    "exchangerate-api": 4,
+    "serpapi": 2,
+    "aviationstack": 2,
+    "nominatim": 1,
+}
+for item in filter(None, os.getenv("JOB_UPSTREAM_LIMITS", "").split(",")):
+    name, _, limit = item.partition("=")
+    UPSTREAM_LIMITS[name.strip()] = int(limit)
+
+SECTION_UPSTREAMS = {
+    "accommodation": ("openai",),
+    "weather": ("openweathermap",),
+    "exchange_rate": ("exchangerate-api",),
+    "transport": ("openai",),
+    "emergency_info": ("openai",),
+    "shopping": ("openai",),
+    "packing_list": ("openai", "openweathermap"),
+    "local_phrases": ("openai",),
+    "places": ("serpapi",),
+    "flights": ("aviationstack",),
+    "map": ("nominatim",),
+}
+
+_executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix="job")
+_loop = None
+_loop_lock = threading.Lock()
+_semaphores = {}
+_lingering = set()
+_jobs = {}
+_inflight = {}
+# Finished jobs a session may pick up again: job ID -> (key, fresh until).
+_finished = {}
+_jobs_lock = threading.Lock()
+_db = None
+_db_lock = threading.Lock()
+
+
+def _connect():
+    global _db
+    if _db is None:
+        if JOB_DB_PATH != ":memory:":
+            os.makedirs(os.path.dirname(JOB_DB_PATH), exist_ok=True)
+        _db = sqlite3.connect(JOB_DB_PATH, check_same_thread=False, timeout=30)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, key TEXT NOT NULL, inputs TEXT NOT NULL, "
+            "sections TEXT NOT NULL, status TEXT NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        _db.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, created_at)")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS job_results (job_id TEXT NOT NULL, section TEXT NOT NULL, "
+            "result TEXT NOT NULL, PRIMARY KEY (job_id, section))"
+        )
+        # Successful sections by their own inputs, shared between jobs.
+        _db.execute("CREATE TABLE IF NOT EXISTS section_results (key TEXT PRIMARY KEY, result TEXT NOT NULL, stored_at REAL NOT NULL)")
+        _db.commit()
+    return _db
+
+
+def _execute(sql, params=()):
+    with _db_lock:
+        db = _connect()
+        db.execute(sql, params)
+        db.commit()
+
+
+def _query(sql, params=()):
+    with _db_lock:
+        return _connect().execute(sql, params).fetchall()
+
+
+def _dump(result):
+    return json.dumps(result._asdict() if isinstance(result, Place) else result, ensure_ascii=False)
+
+
+def _load(key, text):
+    result = json.loads(text)
+    return Place(**result) if key == "map" and isinstance(result, dict) else result
+
+
+def _section_key(section):
+    return cache_key("section", section.key, *section.args)
+
+
+def _store_section(section, result):
+    _execute(
+        "INSERT OR REPLACE INTO section_results (key, result, stored_at) VALUES (?, ?, ?)",
+        (_section_key(section), _dump(result), time.time()),
+    )
+
+
+def _max_age(key):
+    return min(JOB_REUSE_SECONDS, JOB_SECTION_MAX_AGE.get(key, JOB_REUSE_SECONDS))
+
+
+def _stored_section(section):
+    # Returns (result, stored_at), or None when there is nothing fresh.
+    rows = _query(
+        "SELECT result, stored_at FROM section_results WHERE key = ? AND stored_at > ?",
+        (_section_key(section), time.time() - _max_age(section.key)),
+    )
+    return (_load(section.key, rows[0][0]), rows[0][1]) if rows else None
+
+
+class Job:
+    def __init__(self, job_id, key, inputs, sections):
+        self.id = job_id
+        self.key = key
+        self.inputs = inputs
+        self.sections = sections
+        self.keys = [section.key for section in sections]
+        self.results = {}
+        self.done = set()
+        self.failed = set()
+        self.status = "running"
+        self.created_at = time.time()
+        # When the oldest result in the job goes stale; until then a rerun
+        # of the same session may be handed this job again.
+        self.fresh_until = self.created_at + JOB_REUSE_SECONDS
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def stored(self, i, stored_at):
+        self.fresh_until = min(self.fresh_until, stored_at + _max_age(self.keys[i]))
+
+    def update(self, i, text, done):
+        with self._changed:
+            if i in self.done:
+                return
+            self.results[i] = text
+            if done:
+                self.done.add(i)
+            self.version += 1
+            self._changed.notify_all()
+        if done:
+            # Finished sections are written as they land, so a crash or
+            # restart keeps whatever was already paid for.
+            _execute(
+                "INSERT OR REPLACE INTO job_results (job_id, section, result) VALUES (?, ?, ?)",
+                (self.id, self.keys[i], _dump(text)),
+            )
+            _execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), self.id))
+
+    def finish(self):
+        # Jobs with failed or timed-out sections are "partial"; only their
+        # successful sections are reused.
+        status = "partial" if self.failed else "done"
+        _execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), self.id))
+        with self._changed:
+            self.status = status
+            self.version += 1
+            self._changed.notify_all()
+        # From here on the store has everything; readers fall back to it.
+        with _jobs_lock:
+            if _inflight.get(self.key) == self.id:
+                del _inflight[self.key]
+            _jobs.pop(self.id, None)
+            if status == "done":
+                _finished[self.id] = (self.key, self.fresh_until)
+
+    def snapshot(self):
+        with self._changed:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "inputs": self.inputs,
+                "sections": self.keys,
+                "results": {self.keys[i]: text for i, text in self.results.items()},
+                "done": [self.keys[i] for i in sorted(self.done)],
+            }
+
+    def wait(self, version, timeout=None):
+        # Blocks until something changed after `version`; returns the new version.
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version or self.status != "running", timeout)
+            return self.version
+
+
+def _event_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="job-loop", daemon=True).start()
+        return _loop
+
+
+def _semaphore(upstream):
+    # Only ever called on the loop thread, so no lock is needed.
+    if upstream not in _semaphores:
+        _semaphores[upstream] = asyncio.Semaphore(UPSTREAM_LIMITS.get(upstream, JOB_MAX_WORKERS))
+    return _semaphores[upstream]
+
+
+async def _release_after(run, stack):
+    # A timed-out section's thread keeps calling its upstream, so its
+    # permits are only returned once the thread is done.
+    try:
+        await run
+    finally:
+        await stack.aclose()
+        _lingering.discard(asyncio.current_task())
+
+
+async def _run_section(job, i, section):
+    loop = asyncio.get_running_loop()
+    async with contextlib.AsyncExitStack() as stack:
+        # Always taken in the same order, so two-upstream sections can't deadlock.
+        for upstream in sorted(SECTION_UPSTREAMS.get(section.key, ())):
+            await stack.enter_async_context(_semaphore(upstream))
+        run = loop.run_in_executor(_executor, section.run, lambda text: job.update(i, text, False))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(run), section.timeout)
+            failed = section.outcome != "ok"
+        except asyncio.TimeoutError:
+            metrics.section_results.inc(section=section.key, outcome="timeout")
+            result = f"⏱️ {section.title} timed out after {section.timeout:g}s."
+            failed = True
+            _lingering.add(loop.create_task(_release_after(run, stack.pop_all())))
+    if failed:
+        job.failed.add(i)
+    elif result is not None:
+        _store_section(section, result)
+        job.stored(i, time.time())
+    job.update(i, result, True)
+
+
+async def _run_job(job):
+    try:
+        await asyncio.gather(*(_run_section(job, i, section) for i, section in enumerate(job.sections) if i not in job.done))
+    finally:
+        job.finish()
+
+
+def submit_job(destination, num_days, budget, currency="USD", sections=SECTION_KEYS, combined=False, flight_codes="", previous=None):
+    # Returns a job ID at once; the sections run on the shared job loop. An
+    # identical request that is still running gets the existing job's ID, as
+    # does a rerun passing its `previous` job while that is done and fresh;
+    # otherwise sections finished recently by any job are reused as they are.
+    sections = [key for key in SECTION_KEYS if key in sections]
+    inputs = {
+        "destination": destination.strip(), "num_days": num_days, "budget": budget, "currency": currency,
+        "sections": sections, "combined": combined, "flight_codes": flight_codes,
+    }
+    key = cache_key("job", inputs)
+    with _jobs_lock:
+        job_id = _inflight.get(key)
+        if job_id is not None:
+            return job_id
+        now = time.time()
+        for stale in [job_id for job_id, (_, fresh_until) in _finished.items() if fresh_until <= now]:
+            del _finished[stale]
+        if previous in _finished and _finished[previous][0] == key:
+            return previous
+
+    built = build_sections(inputs["destination"], num_days, budget, currency, sections, combined, flight_codes)
+    job = Job(uuid.uuid4().hex[:16], key, inputs, built)
+    with _jobs_lock:
+        # Another session may have submitted the same plan meanwhile.
+        if key in _inflight:
+            return _inflight[key]
+        _inflight[key] = job.id
+        _jobs[job.id] = job
+    _execute(
+        "INSERT INTO jobs (id, key, inputs, sections, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (job.id, key, json.dumps(inputs), json.dumps(job.keys), "running", job.created_at, job.created_at),
+    )
+    for i, section in enumerate(built):
+        stored = _stored_section(section)
+        if stored is not None:
+            job.stored(i, stored[1])
+            job.update(i, stored[0], True)
+    _execute("DELETE FROM job_results WHERE job_id IN (SELECT id FROM jobs WHERE updated_at < ?)", (time.time() - JOB_RETENTION_SECONDS,))
+    _execute("DELETE FROM jobs WHERE updated_at < ?", (time.time() - JOB_RETENTION_SECONDS,))
+    _execute("DELETE FROM section_results WHERE stored_at < ?", (time.time() - JOB_REUSE_SECONDS,))
+    asyncio.run_coroutine_threadsafe(_run_job(job), _event_loop())
+    return job.id
+
+
+def get_job(job_id):
+    # Poll: the job's status and every result so far, from memory while this
+    # process runs it and from the store otherwise.
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job.snapshot()
+    rows = _query("SELECT inputs, sections, status, updated_at FROM jobs WHERE id = ?", (job_id,))
+    if not rows:
+        return None
+    inputs, keys, status, updated_at = rows[0]
+    if status == "running" and time.time() - updated_at > JOB_STALE_SECONDS:
+        status = "interrupted"
+    results = {section: _load(section, text) for section, text in _query("SELECT section, result FROM job_results WHERE job_id = ?", (job_id,))}
+    keys = json.loads(keys)
+    return {
+        "id": job_id,
+        "status": status,
+        "inputs": json.loads(inputs),
+        "sections": keys,
+        "results": results,
+        "done": [key for key in keys if key in results],
+    }
+
+
+def job_events(job_id, timeout=None):
+    # Subscribe: the same (index, text, done) events as stream_sections,
+    # indexed by the job's section order. Results that are already in come
+    # first, so a late subscriber catches up before following live updates.
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        snapshot = get_job(job_id)
+        if snapshot is None:
+            return
+        for i, key in enumerate(snapshot["sections"]):
+            if key in snapshot["results"]:
+                yield i, snapshot["results"][key], True
+        return
+
+    seen = {}
+    version = None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with job._changed:
+            current = dict(job.results)
+            done = set(job.done)
+            finished = job.status != "running"
+            version = job.version
+        for i in sorted(current):
+            if i not in seen or seen[i] != (current[i], i in done):
+                seen[i] = (current[i], i in done)
+                yield i, current[i], i in done
+        if finished:
+            return
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return
+        job.wait(version, remaining)
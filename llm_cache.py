@@ -0,0 +1,70 @@
+import os
+import re
+
+import metrics
+from cache_store import TieredCache, cache_key
+from rate_limiter import SingleFlight
+from semantic_cache import SemanticIndex
+
+DAY = 86400
+
+# How long an answer stays fresh, per report section. Packing lists depend on
+# the weather, so they expire quickly; phrasebooks practically never change.
+SECTION_TTLS = {
+    "transport": 7 * DAY,
+    "emergency_info": 30 * DAY,
+    "accommodation": 3 * DAY,
+    "shopping": 14 * DAY,
+    "packing_list": 1 * DAY,
+    "local_phrases": 90 * DAY,
+}
+DEFAULT_TTL = int(os.getenv("LLM_CACHE_TTL", str(DAY)))
+
+prompt_cache = TieredCache(
+    "llm_responses",
+    memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512")),
+    disk_entries=int(os.getenv("LLM_CACHE_DISK_ENTRIES", "20000")),
+    default_ttl=DEFAULT_TTL,
+)
+
+
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt).strip().casefold()
+
+
+def section_ttl(section):
+    return SECTION_TTLS.get(section, DEFAULT_TTL)
+
+
+semantic_index = SemanticIndex(prompt_cache)
+# Sessions asking the same question at once wait for one completion.
+_flights = SingleFlight("llm")
+
+
+def cached_completion(prompt, model, section, complete, ttl=None, place_id=None):
+    # Exact match on the normalized prompt first. With a canonical place_id,
+    # a near-identical earlier prompt about the same place also counts.
+    normalized = normalize_prompt(prompt)
+    key = cache_key(model, normalized)
+    bucket = cache_key(model, section, place_id) if place_id else None
+    response = prompt_cache.get(key)
+    if response is not None:
+        metrics.llm_cache_results.inc(section=section or "other", result="exact")
+        return response
+    if bucket is not None:
+        similar = semantic_index.lookup(bucket, normalized)
+        response = prompt_cache.get(similar) if similar else None
+        if response is not None:
+            metrics.llm_cache_results.inc(section=section or "other", result="semantic")
+            return response
+
+    metrics.llm_cache_results.inc(section=section or "other", result="miss")
+    ttl = section_ttl(section) if ttl is None else ttl
+
+    def compute():
+        response = complete()
+        prompt_cache.set(key, response, ttl)
+        if bucket is not None:
+            semantic_index.add(bucket, normalized, key, ttl)
+        return response
+    return _flights.do(key, compute)
@@ -0,0 +1,58 @@
+import contextvars
+import time
+
+import metrics
+import rate_limiter
+
+# Minimum time between placeholder updates; token-by-token redraws would
+# flood the Streamlit websocket without looking any smoother.
+CHUNK_FLUSH_INTERVAL = 0.05
+
+# Where record_timing writes: Section.run points it at that run's own dict,
+# so concurrent sessions never see each other's timings.
+run_timings = contextvars.ContextVar("run_timings", default=None)
+
+
+def record_timing(section, ttft, total):
+    timings = run_timings.get()
+    if timings is not None:
+        timings[section or "default"] = {"ttft": ttft, "total": total}
+
+
+def stream_completion(client, prompt, model, section=None):
+    rate_limiter.acquire("openai")
+    started = time.perf_counter()
+    ttft = None
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        stream=True,
+        # The final chunk then carries token usage, with no choices.
+        stream_options={"include_usage": True},
+    )
+    for chunk in stream:
+        if getattr(chunk, "usage", None):
+            metrics.record_llm_usage(model, section, chunk.usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            yield delta
+    total = time.perf_counter() - started
+    record_timing(section, ttft, total)
+    metrics.llm_duration.observe(total, model=model)
+
+
+def collect_stream(chunks, on_chunk):
+    text = ""
+    last_flush = 0.0
+    for delta in chunks:
+        text += delta
+        now = time.perf_counter()
+        if now - last_flush >= CHUNK_FLUSH_INTERVAL:
+            on_chunk(text)
+            last_flush = now
+    on_chunk(text)
+    return text
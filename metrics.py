@@ -0,0 +1,278 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per million tokens (input, output). Unknown models are counted in
+# tokens but priced at zero.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+}
+
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels):
+        return self.values.get(_label_key(labels), 0.0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            else:
+                entry[0][-1] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def quantile(self, q, **labels):
+        # Linear interpolation inside the bucket, like PromQL's histogram_quantile.
+        with self._lock:
+            entry = self.values.get(_label_key(labels))
+            if not entry or not entry[2]:
+                return None
+            counts, rank = list(entry[0]), q * entry[2]
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if count and seen + count >= rank:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.buckets[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+                    cumulative += bucket_count
+                    le = bound if bound == "+Inf" else f"{bound:g}"
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+section_duration = Histogram("travel_section_duration_seconds", "Time to produce one report section.")
+section_results = Counter("travel_section_results_total", "Report sections finished, by outcome.")
+http_duration = Histogram("travel_http_request_duration_seconds", "Duration of one HTTP attempt to an upstream API.")
+http_requests = Counter("travel_http_requests_total", "HTTP attempts to upstream APIs, by status.")
+upstream_failures = Counter("travel_upstream_failures_total", "Failed upstream attempts (connection errors, timeouts, 429/5xx, open breaker).")
+llm_duration = Histogram("travel_llm_request_duration_seconds", "Duration of one chat completion request.")
+llm_tokens = Counter("travel_llm_tokens_total", "Tokens consumed by chat completions.")
+llm_cost = Counter("travel_llm_cost_usd_total", "Estimated chat completion cost in USD.")
+llm_cache_results = Counter("travel_llm_cache_results_total", "LLM response cache lookups: exact hit, semantic hit or miss.")
+rate_limit_wait = Histogram("travel_rate_limit_wait_seconds", "Time spent waiting for an upstream rate limit token.")
+coalesced_requests = Counter("travel_coalesced_requests_total", "Calls that shared an identical in-flight call instead of making their own.")
+
+_registry = [section_duration, section_results, http_duration, http_requests, upstream_failures, llm_duration, llm_tokens, llm_cost, llm_cache_results, rate_limit_wait, coalesced_requests]
+caches = {}
+
+
+def reset():
+    # Starts every counter and histogram from zero, e.g. between benchmark runs.
+    for metric in _registry:
+        with metric._lock:
+            metric.values.clear()
+
+
+def register_cache(name, cache):
+    caches[name] = cache
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    for prefix, (input_price, output_price) in sorted(MODEL_PRICES.items(), key=lambda item: -len(item[0])):
+        if model.startswith(prefix):
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+def record_llm_usage(model, section, usage):
+    if usage is None:
+        return
+    section = section or "other"
+    llm_tokens.inc(usage.prompt_tokens, model=model, section=section, kind="prompt")
+    llm_tokens.inc(usage.completion_tokens, model=model, section=section, kind="completion")
+    llm_cost.inc(estimate_cost(model, usage.prompt_tokens, usage.completion_tokens), model=model, section=section)
+
+
+@contextmanager
+def span(histogram, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+
+def render_prometheus():
+    lines = []
+    for metric in _registry:
+        lines += metric.render()
+    if caches:
+        lines += ["# HELP travel_cache_lookups_total Cache lookups by tier and result.", "# TYPE travel_cache_lookups_total counter"]
+        for name, cache in sorted(caches.items()):
+            stats = cache.stats()
+            for result, value in (("memory_hit", stats["memory_hits"]), ("disk_hit", stats["disk_hits"]), ("miss", stats["misses"])):
+                lines.append(f'travel_cache_lookups_total{{cache="{name}",result="{result}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def section_report():
+    # One row per section for the in-app debug panel.
+    # Other sessions record while this runs, so work from copies taken
+    # under each metric's lock.
+    with section_duration._lock:
+        durations = {key: (entry[1], entry[2]) for key, entry in section_duration.values.items()}
+    with llm_tokens._lock:
+        token_values = list(llm_tokens.values.items())
+    with llm_cost._lock:
+        cost_values = list(llm_cost.values.items())
+
+    def spend(section):
+        tokens = sum(value for token_key, value in token_values if dict(token_key)["section"] == section)
+        cost = sum(value for cost_key, value in cost_values if dict(cost_key)["section"] == section)
+        return int(tokens), round(cost, 5)
+
+    rows = []
+    for key in sorted(durations):
+        labels = dict(key)
+        section = labels["section"]
+        total, count = durations[key]
+        tokens, cost = spend(section)
+        rows.append({
+            "section": section,
+            "runs": count,
+            "mean_s": round(total / count, 3),
+            "p50_s": round(section_duration.quantile(0.5, **labels), 3),
+            "p95_s": round(section_duration.quantile(0.95, **labels), 3),
+            "errors": int(section_results.get(section=section, outcome="error") + section_results.get(section=section, outcome="timeout")),
+            "tokens": tokens,
+            "cost_usd": cost,
+        })
+    # Spend recorded under a label no section runs as, e.g. "combined" for
+    # the one request behind every LLM section in combined mode.
+    timed = {row["section"] for row in rows}
+    for section in sorted({dict(token_key)["section"] for token_key, _ in token_values} - timed):
+        tokens, cost = spend(section)
+        rows.append({
+            "section": section,
+            "runs": 0,
+            "mean_s": None,
+            "p50_s": None,
+            "p95_s": None,
+            "errors": 0,
+            "tokens": tokens,
+            "cost_usd": cost,
+        })
+    return rows
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def write_prometheus(path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    # Replace atomically so a scraper never reads a half-written file.
+    os.replace(tmp_path, path)
+
+
+def start_exporters(port=None, path=None):
+    # METRICS_PORT serves /metrics over HTTP, METRICS_FILE is rewritten every
+    # METRICS_FILE_INTERVAL seconds (e.g. for node_exporter's textfile
+    # collector). Streamlit reruns the script on every interaction, so this
+    # only ever starts once per process.
+    global _exporters_started
+    port = port or os.getenv("METRICS_PORT")
+    path = path or os.getenv("METRICS_FILE")
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    if port:
+        server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if path:
+        def write_forever():
+            while True:
+                try:
+                    write_prometheus(path)
+                except OSError:
+                    pass
+                time.sleep(METRICS_FILE_INTERVAL)
+
+        threading.Thread(target=write_forever, name="metrics-file", daemon=True).start()
@@ -1,29 +1,13 @@
-import os
-from textwrap import dedent
-import openai
 import streamlit as st
-import folium
-from agno.agent import Agent
-from agno.tools.serpapi import SerpApiTools
-from streamlit_folium import folium_static
-import requests
-from fpdf import FPDF
-from geopy.geocoders import Nominatim
-import dotenv
+from job_queue import job_events, submit_job
+from metrics import render_prometheus, section_report
+from plan_state import session_plan
+from travel_engine import build_sections, missing_api_keys
 
-dotenv.load_dotenv(override=True)
-OPENAI_API_KEY =os.getenv("OPENAI_API_KEY")
-SERP_API_KEY = os.getenv("SERP_API_KEY")
-WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
-EXCHANGE_API_KEY = os.getenv("EXCHANGE_API_KEY")
-AVIATION_API_KEY = os.getenv("AVIATION_API_KEY")
-
-if not OPENAI_API_KEY or not SERP_API_KEY or not WEATHER_API_KEY or not EXCHANGE_API_KEY:
+if missing_api_keys():
     st.error("Missing API Keys! Please add them.")
     st.stop()
 
-client = openai.OpenAI()
-
 st.set_page_config(page_title="AI Travel Planner", page_icon="✈️", layout="wide")
 st.title("🌍 AI Travel Planner")
 st.caption("Plan your next adventure with AI-powered research and itinerary generation.")
@@ -31,180 +15,108 @@ st.caption("Plan your next adventure with AI-powered research and itinerary gene
 destination = st.text_input("📍 Where do you want to go?")
 num_days = st.number_input("📅 How many days?", min_value=1, max_value=30, value=5)
 budget = st.selectbox("💰 Choose Budget Level", ["Low", "Mid", "Luxury"])
-get_weather = st.checkbox("🌦️ Include Weather Forecast")
-get_cuisine = st.checkbox("🍽️ Include Local Cuisine Recommendations")
-get_exchange_rate = st.checkbox("💱 Include Currency Exchange Rate")
-get_transport = st.checkbox("🚕 Include Transport Info")
-get_emergency_info = st.checkbox("🏥 Include Emergency Contacts")
-get_accommodation = st.checkbox("🏨 Include Accommodation Suggestions")
-get_shopping = st.checkbox("🛍️ Include Shopping & Souvenirs Guide")
-get_packing_list = st.checkbox("🎒 Include Smart Packing List")
-get_local_phrases = st.checkbox("🔊 Include Basic Local Phrases")
-get_flight_info = st.checkbox("🛩️ Include Real-Time Flight Tracker")
-
-import requests
-
-def get_currency_exchange_rate(currency):
-   
-    url = f"https://v6.exchangerate-api.com/v6/{EXCHANGE_API_KEY}/latest/USD"
-    
-    try:
-        response = requests.get(url)
-        data = response.json()
-        if data.get("result") != "success":
-            return f"API Error: {data.get('error-type', 'Unknown error')}"
-        if "conversion_rates" not in data:
-            return " Error: No conversion rates found in API response."
-        return data["conversion_rates"].get(currency, "Currency Not Found.")
-    except requests.exceptions.RequestException as e:
-        return f" API Request Failed: {e}"
-
-
-def get_transport_info(destination):
-    prompt = f"Provide public transport and taxi options in {destination}."
-    return client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    ).choices[0].message.content
-
-def get_emergency_info(destination):
-    prompt = f"List emergency contacts (hospitals, embassies, police) in {destination}."
-    return client.chat.completions.create(
-        model="gpt-4-turbo",
-        messages=[{"role": "user", "content": prompt}]
-    ).choices[0].message.content
-
-def get_accommodation(destination, budget):
-    prompt = f"List best {budget}-budget hotels and stays in {destination}."
-    return client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    ).choices[0].message.content
-
-def get_shopping_guide(destination):
-    prompt = f"Provide famous shopping places and souvenirs in {destination}."
-    return client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    ).choices[0].message.content
-
-def get_packing_list(destination, num_days):
-    prompt = f"Generate a packing list for a {num_days}-day trip to {destination} considering weather and activities."
-    return client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    ).choices[0].message.content
-
-
-def get_flight_info(flight_iata):
-    if not AVIATION_API_KEY:
-        return " Missing API Key for AviationStack."
-
-    url = f"http://api.aviationstack.com/v1/flights?access_key={AVIATION_API_KEY}&flight_iata={flight_iata}"
-    response = requests.get(url).json()
-    
-    if "data" in response and len(response["data"]) > 0:
-        flight = response["data"][0]
-
-        airline = flight.get("airline", {}).get("name", "Unknown Airline")
-        status = flight.get("flight_status", "Unknown Status")
-
-        departure_airport = flight.get("departure", {}).get("airport", "Unknown Airport")
-        departure_time = flight.get("departure", {}).get("estimated", "N/A")
-
-        arrival_airport = flight.get("arrival", {}).get("airport", "Unknown Airport")
-        arrival_time = flight.get("arrival", {}).get("estimated", "N/A")
-
-        return f"""
-        ✈️ **Flight Status**: {status}
-        🏢 **Airline**: {airline}
-        🛫 **Departure**: {departure_airport} at {departure_time}
-        🛬 **Arrival**: {arrival_airport} at {arrival_time}
-        """
-    
-    return " Flight information not available. Please check the flight code."
-
-def get_local_phrases(destination):
-    prompt = f"Provide essential travel phrases in the local language of {destination}."
-    return client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    ).choices[0].message.content
-    
-def get_weather_info(destination):
-    weather_url = f"http://api.openweathermap.org/data/2.5/weather?q={destination}&appid={WEATHER_API_KEY}&units=metric"
-    
-    try:
-        response = requests.get(weather_url)
-        data = response.json()
-        if response.status_code != 200 or "main" not in data:
-            return f" Weather data not available: {data.get('message', 'Unknown error')}"
-        
-        weather_desc = data["weather"][0]["description"].capitalize()
-        temp = data["main"]["temp"]
-        humidity = data["main"]["humidity"]
-        wind_speed = data["wind"]["speed"]
-
-        return f"🌡️ **Temperature:** {temp}°C\n💨 **Wind Speed:** {wind_speed} m/s\n💧 **Humidity:** {humidity}%\n☁️ **Condition:** {weather_desc}"
-
-    except requests.exceptions.RequestException as e:
-        return f" API Request Failed: {e}"
-
-
-
+show_weather = st.checkbox("🌦️ Include Weather Forecast")
+show_cuisine = st.checkbox("🍽️ Include Local Cuisine Recommendations")
+show_exchange_rate = st.checkbox("💱 Include Currency Exchange Rate")
+show_transport = st.checkbox("🚕 Include Transport Info")
+show_emergency_info = st.checkbox("🏥 Include Emergency Contacts")
+show_accommodation = st.checkbox("🏨 Include Accommodation Suggestions")
+show_shopping = st.checkbox("🛍️ Include Shopping & Souvenirs Guide")
+show_packing_list = st.checkbox("🎒 Include Smart Packing List")
+show_local_phrases = st.checkbox("🔊 Include Basic Local Phrases")
+show_flight_info = st.checkbox("🛩️ Include Real-Time Flight Tracker")
+# Outside the button branch, so typing codes doesn't need the widget to exist first.
+flight_codes = st.text_input("✈️ Flight IATA Codes, comma-separated (e.g., AI101, BA142)") if show_flight_info else ""
+combined_mode = st.checkbox("⚡ Generate AI sections in one combined request")
+export_pdf = st.checkbox("📄 Prepare a PDF download")
+background = st.checkbox("🕒 Run in the background (keeps going if you close the tab)")
+
+plan_inputs = (destination.strip(), num_days, budget, "USD")
 if st.button("🛫 Generate Travel Plan"):
+    st.session_state["plan_inputs"] = plan_inputs
+# The plan stays up across reruns (toggling a section, typing flight codes,
+# downloading) until one of the inputs it was generated for changes.
+if st.session_state.get("plan_inputs") == plan_inputs:
     if not destination.strip():
         st.warning("⚠️ Please enter a valid destination.")
     else:
         st.subheader("📌 AI-Powered Travel Research")
         st.markdown(f"Researching {destination} for {num_days} days...")
         
-        if get_accommodation:
-            st.subheader("🏨 Accommodation Suggestions")
-            st.markdown(get_accommodation(destination, budget))
-        
-        if get_weather:
-          st.subheader("🌦️ Real-Time Weather Forecast")
-          st.markdown(get_weather_info(destination))
-        
-        if get_cuisine:
-            st.subheader("🍽️ Local Cuisine")
-            st.markdown("Cuisine Recommendations Here")
-        
-        if get_exchange_rate:
-            st.subheader("💱 Currency Exchange")
-            st.markdown(f"1 USD = {get_currency_exchange_rate('INR')} INR")
-        
-        if get_transport:
-            st.subheader("🚕 Transport Options")
-            st.markdown(get_transport_info(destination))
-        
-        if get_emergency_info:
-            st.subheader("🏥 Emergency Contacts")
-            st.markdown(get_emergency_info(destination))
-        
-        if get_shopping:
-            st.subheader("🛍️ Shopping & Souvenirs Guide")
-            st.markdown(get_shopping_guide(destination))
-        
-        if get_packing_list:
-            st.subheader("🎒 Smart Packing List")
-            st.markdown(get_packing_list(destination, num_days))
-        
-        if get_local_phrases:
-            st.subheader("🔊 Basic Local Language Phrases")
-            st.markdown(get_local_phrases(destination))
-        
-        if get_flight_info:
-            st.subheader("🛩️ Real-Time Flight Tracker")
-            flight_code = st.text_input("Enter Flight IATA Code (e.g., AI101)")
-            st.markdown(get_flight_info(flight_code))
+        enabled = {
+            "accommodation": show_accommodation,
+            "weather": show_weather,
+            "cuisine": show_cuisine,
+            "exchange_rate": show_exchange_rate,
+            "transport": show_transport,
+            "emergency_info": show_emergency_info,
+            "shopping": show_shopping,
+            "packing_list": show_packing_list,
+            "local_phrases": show_local_phrases,
+            "flights": show_flight_info,
+            # The geocode runs alongside the text sections; the map itself is drawn last.
+            "map": True,
+        }
+        sections = build_sections(destination, num_days, budget, "USD", [key for key, show in enabled.items() if show], combined_mode, flight_codes)
+
+        plan_pdf = None
+        if export_pdf:
+            from pdf_export import PlanPdf, slugify
+
+            # Laid out section by section while the rest are still loading.
+            plan_pdf = PlanPdf(destination, num_days, budget, "USD", [(section.key, section.title) for section in sections])
+
+        placeholders = []
+        for section in sections[:-1]:
+            st.subheader(section.title)
+            placeholders.append(st.empty())
+            placeholders[-1].markdown("⏳ Loading...")
+
+        map_center = None
+        if background:
+            # Same plan requested again (or by someone else) joins the running
+            # job or picks up its stored results; a rerun with unchanged inputs
+            # keeps this session's job while its results are fresh.
+            job_id = submit_job(destination, num_days, budget, "USD", [section.key for section in sections], combined_mode, flight_codes, st.session_state.get("job_id"))
+            st.session_state["job_id"] = job_id
+            st.caption(f"Background job {job_id}")
+            events = job_events(job_id)
+        else:
+            # Sections finished on an earlier run come back from the session.
+            events = session_plan(st.session_state).stream(sections)
+        for i, text, done in events:
+            if done and plan_pdf is not None:
+                plan_pdf.add(sections[i].key, text)
+            if sections[i].key == "map":
+                map_center = text
+            else:
+                placeholders[i].markdown(text if done else text + " ▌")
+
+        # Only sections this run actually generated have timings.
+        timings = {name: timing for section in sections for name, timing in section.timings.items()}
+        if timings:
+            with st.expander("⏱️ Section timings"):
+                for name, timing in timings.items():
+                    ttft = f"{timing['ttft']:.2f}s" if timing["ttft"] is not None else "n/a"
+                    st.markdown(f"- **{name}**: first token {ttft}, total {timing['total']:.2f}s")
+
+        # Process-wide numbers: every run since the server started, all sessions.
+        with st.expander("🔧 Debug metrics"):
+            st.dataframe(section_report())
+            st.download_button("Download Prometheus metrics", render_prometheus(), file_name="metrics.prom", mime="text/plain")
+
         st.subheader("🗺️ Interactive Map")
         
-        map_center = Nominatim(user_agent="geoapi").geocode(destination)
-        if map_center:
+        if map_center and not isinstance(map_center, str):
+            # folium is only worth importing once there is a map to draw.
+            import folium
+            from streamlit_folium import folium_static
+
             m = folium.Map(location=[map_center.latitude, map_center.longitude], zoom_start=12)
             folium.Marker([map_center.latitude, map_center.longitude], tooltip=destination).add_to(m)
             folium_static(m)
         else:
             st.warning("Could not generate map for this location.")
+
+        if plan_pdf is not None:
+            st.download_button("📄 Download PDF", plan_pdf.finish(), file_name=f"{slugify(destination)}-itinerary.pdf", mime="application/pdf")
@@ -0,0 +1,441 @@
+import copy
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+PDF_FONT_DIR = os.getenv("PDF_FONT_DIR", "/usr/share/fonts/truetype/dejavu")
+PDF_FONT_REGULAR = os.getenv("PDF_FONT_REGULAR", "DejaVuSans.ttf")
+PDF_FONT_BOLD = os.getenv("PDF_FONT_BOLD", "DejaVuSans-Bold.ttf")
+# Half the width of the static map, in degrees of longitude.
+MAP_SPAN_DEGREES = float(os.getenv("PDF_MAP_SPAN_DEGREES", "6"))
+MAP_LABELS = 25
+
+LINE_HEIGHT = 5
+ACCENT = (31, 78, 121)
+LINK_COLOR = (20, 90, 200)
+# Section titles that only make sense on screen.
+PDF_TITLES = {"map": "🗺️ Map"}
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*)")
+BULLET = re.compile(r"^(\s*)(?:[-*+•]|\d+[.)])\s+(.*)")
+TABLE_RULE = re.compile(r"^:?-{2,}:?$")
+INLINE = re.compile(r"(\*\*.+?\*\*|\[[^\]]+\]\([^)\s]+\))")
+# Core fonts only cover Latin-1; these are the usual typographic strays.
+LATIN1_REPLACEMENTS = str.maketrans({"–": "-", "—": "-", "‘": "'", "’": "'", "“": '"', "”": '"', "•": "-", "…": "...", "▌": ""})
+
+
+@lru_cache(maxsize=None)
+def _template():
+    # Parsing the TrueType fonts is most of the fixed cost of a document, so
+    # every export starts from a deep copy of one prepared FPDF instead.
+    from fpdf import FPDF
+
+    class ItineraryPDF(FPDF):
+        footer_text = ""
+
+        def footer(self):
+            self.set_y(-12)
+            self.set_font(self.body_family, size=8)
+            self.set_text_color(120, 120, 120)
+            self.cell(0, 6, f"{self.footer_text}  ·  {self.page_no()}", align="C")
+
+    pdf = ItineraryPDF(format="A4")
+    pdf.set_margins(15, 15, 15)
+    pdf.set_auto_page_break(True, margin=18)
+    pdf.set_creator("AI Travel Planner")
+    regular = os.path.join(PDF_FONT_DIR, PDF_FONT_REGULAR)
+    bold = os.path.join(PDF_FONT_DIR, PDF_FONT_BOLD)
+    if os.path.exists(regular) and os.path.exists(bold):
+        pdf.add_font("body", "", regular)
+        pdf.add_font("body", "B", bold)
+        pdf.body_family = "body"
+        pdf.unicode = True
+        pdf.glyphs = frozenset(pdf.fonts["body"].cmap) | {10}
+    else:
+        pdf.body_family = "helvetica"
+        pdf.unicode = False
+        pdf.glyphs = None
+    return pdf
+
+
+def clean_text(pdf, text):
+    if pdf.glyphs is None:
+        return text.translate(LATIN1_REPLACEMENTS).encode("latin-1", "ignore").decode("latin-1")
+    # Drops what the font can't draw, which is mostly emoji (and the
+    # variation selector that follows some of them).
+    return "".join(ch for ch in text if ord(ch) in pdf.glyphs and ch != "\ufe0f")
+
+
+def slugify(value):
+    return re.sub(r"[^0-9a-z]+", "-", value.casefold()).strip("-") or "plan"
+
+
+def map_location(result):
+    # The map section is a Place from the UI, a dict from generate_plan, or
+    # an error string / None when geocoding failed.
+    if isinstance(result, dict) and "latitude" in result:
+        return result.get("address", ""), result["latitude"], result["longitude"]
+    if hasattr(result, "latitude"):
+        return result.address, result.latitude, result.longitude
+    return None
+
+
+class PlanPdf:
+    # Sections can be added in any order, as they finish; each is laid out as
+    # soon as every section before it in display order is in.
+
+    def __init__(self, destination, num_days, budget, currency, sections):
+        self.sections = list(sections)
+        self.pdf = copy.deepcopy(_template())
+        self._pending = {}
+        self._next = 0
+        self._widths = {}
+        pdf = self.pdf
+        pdf.footer_text = clean_text(pdf, f"{destination} · {num_days} days")
+        pdf.set_title(clean_text(pdf, f"Trip to {destination}"))
+        pdf.add_page()
+        pdf.set_font(pdf.body_family, "B", 22)
+        pdf.set_text_color(*ACCENT)
+        pdf.multi_cell(0, 10, clean_text(pdf, f"Trip to {destination}"), new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font(pdf.body_family, size=11)
+        pdf.set_text_color(90, 90, 90)
+        pdf.cell(0, 7, f"{num_days} days, {budget} budget, {currency}. Generated {time.strftime('%Y-%m-%d')}.", new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(4)
+
+    def add(self, key, result):
+        self._pending[key] = result
+        while self._next < len(self.sections) and self.sections[self._next][0] in self._pending:
+            key, title = self.sections[self._next]
+            self._render(key, title, self._pending.pop(key))
+            self._next += 1
+
+    def _flush(self):
+        # Sections that never arrived (e.g. timed out) are left out.
+        for key, title in self.sections[self._next:]:
+            if key in self._pending:
+                self._render(key, title, self._pending.pop(key))
+        self._next = len(self.sections)
+
+    def finish(self):
+        self._flush()
+        data = bytes(self.pdf.output())
+        # The page buffers are as large as the output; don't keep both.
+        self.pdf = None
+        return data
+
+    def finish_into(self, path):
+        # Writes straight to disk, without the bytes copy finish() returns.
+        self._flush()
+        self.pdf.output(path)
+        self.pdf = None
+
+    def _render(self, key, title, result):
+        pdf = self.pdf
+        title = clean_text(pdf, PDF_TITLES.get(key, title)).strip()
+        if pdf.will_page_break(30):
+            pdf.add_page()
+        pdf.start_section(title)
+        pdf.set_font(pdf.body_family, "B", 15)
+        pdf.set_text_color(*ACCENT)
+        pdf.cell(0, 9, title, new_x="LMARGIN", new_y="NEXT")
+        pdf.set_draw_color(*ACCENT)
+        pdf.line(pdf.l_margin, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+        pdf.ln(2)
+        pdf.set_text_color(0, 0, 0)
+        if key == "map":
+            self._render_map(result)
+        else:
+            self._render_markdown("" if result is None else str(result))
+        pdf.ln(4)
+
+    def _render_markdown(self, text):
+        pdf = self.pdf
+        lines = clean_text(pdf, text).splitlines()
+        i = 0
+        while i < len(lines):
+            line = lines[i].rstrip()
+            if line.lstrip().startswith("|"):
+                rows = []
+                while i < len(lines) and lines[i].lstrip().startswith("|"):
+                    cells = [cell.strip() for cell in lines[i].strip().strip("|").split("|")]
+                    if not all(TABLE_RULE.match(cell) for cell in cells):
+                        rows.append(cells)
+                    i += 1
+                self._render_table(rows)
+                continue
+            i += 1
+            if not line.strip():
+                pdf.ln(2)
+                continue
+            heading = HEADING.match(line)
+            bullet = BULLET.match(line)
+            if heading:
+                pdf.set_font(pdf.body_family, "B", 13 if len(heading.group(1)) <= 2 else 11)
+                pdf.multi_cell(0, 7, heading.group(2).replace("**", ""), new_x="LMARGIN", new_y="NEXT")
+            elif bullet:
+                indent = 4 + min(len(bullet.group(1).expandtabs(2)), 8)
+                pdf.set_font(pdf.body_family, size=10)
+                pdf.set_x(pdf.l_margin + indent - 3)
+                pdf.cell(3, LINE_HEIGHT, "•" if pdf.unicode else "-")
+                margin = pdf.l_margin
+                pdf.set_left_margin(margin + indent)
+                self._write_inline(bullet.group(2))
+                pdf.set_left_margin(margin)
+            else:
+                self._write_inline(line)
+
+    def _runs(self, text):
+        # **bold** and [links](url); everything else is plain text.
+        for part in INLINE.split(text):
+            if not part:
+                continue
+            if part.startswith("**") and part.endswith("**") and len(part) > 4:
+                yield "B", None, part[2:-2]
+            elif part.startswith("[") and part.endswith(")"):
+                label, url = part[1:].split("](", 1)
+                yield "", url[:-1], label
+            else:
+                yield "", None, part
+
+    def _width(self, style, text):
+        key = (style, text)
+        width = self._widths.get(key)
+        if width is None:
+            self.pdf.set_font(self.pdf.body_family, style, 10)
+            width = self._widths[key] = self.pdf.get_string_width(text)
+        return width
+
+    def _write_inline(self, text):
+        # Greedy word wrap over cached word widths. fpdf's own write() re-measures
+        # the line so far for every character, which made long plans take
+        # seconds; this lays out each line once and emits one cell per run.
+        pdf = self.pdf
+        left, right = pdf.l_margin, pdf.w - pdf.r_margin
+        x = pdf.get_x()
+        line = []
+        for style, link, run in self._runs(text):
+            for word in re.findall(r"\s*\S+\s*|\s+", run):
+                width = self._width(style, word)
+                if line and x + self._width(style, word.rstrip()) > right:
+                    self._emit_line(line)
+                    line, x, word = [], left, word.lstrip()
+                    width = self._width(style, word)
+                if line and line[-1][0] == style and line[-1][1] == link:
+                    line[-1][2] += word
+                    line[-1][3] += width
+                else:
+                    line.append([style, link, word, width])
+                x += width
+        self._emit_line(line)
+
+    def _emit_line(self, line):
+        pdf = self.pdf
+        if not line:
+            return
+        if pdf.will_page_break(LINE_HEIGHT):
+            x = pdf.get_x()
+            pdf.add_page()
+            pdf.set_x(x)
+        for style, link, text, width in line:
+            pdf.set_font(pdf.body_family, style, 10)
+            if link:
+                pdf.set_text_color(*LINK_COLOR)
+            pdf.cell(width, LINE_HEIGHT, text, link=link or "")
+            if link:
+                pdf.set_text_color(0, 0, 0)
+        pdf.set_font(pdf.body_family, size=10)
+        pdf.ln(LINE_HEIGHT)
+        pdf.set_x(pdf.l_margin)
+
+    def _render_table(self, rows):
+        if not rows:
+            return
+        pdf = self.pdf
+        width = max(len(row) for row in rows)
+        pdf.set_font(pdf.body_family, size=8)
+        with pdf.table(line_height=4.5, text_align="LEFT") as table:
+            for row in rows:
+                cells = table.row()
+                for cell in row + [""] * (width - len(row)):
+                    cells.cell(cell.replace("**", ""))
+        pdf.set_font(pdf.body_family, size=10)
+        pdf.ln(2)
+
+    def _render_map(self, result):
+        pdf = self.pdf
+        location = map_location(result)
+        pdf.set_font(pdf.body_family, size=10)
+        if location is None:
+            pdf.multi_cell(0, LINE_HEIGHT, "Could not generate map for this location.", new_x="LMARGIN", new_y="NEXT")
+            return
+        address, latitude, longitude = location
+        width = pdf.w - pdf.l_margin - pdf.r_margin
+        height = width * 0.6
+        if pdf.will_page_break(height + 12):
+            pdf.add_page()
+        draw_static_map(pdf, latitude, longitude, pdf.l_margin, pdf.get_y(), width, height)
+        pdf.set_y(pdf.get_y() + height + 2)
+        pdf.set_font(pdf.body_family, size=10)
+        pdf.multi_cell(0, LINE_HEIGHT, clean_text(pdf, f"{address} ({latitude:.4f}, {longitude:.4f})"), new_x="LMARGIN", new_y="NEXT")
+
+
+def _nice_step(value, steps=(1, 2, 5)):
+    magnitude = 10 ** math.floor(math.log10(value))
+    return max(step * magnitude for step in steps if step * magnitude <= value)
+
+
+def draw_static_map(pdf, latitude, longitude, x, y, width, height):
+    # A locator map from fpdf primitives only: graticule, gazetteer cities
+    # around the destination, a scale bar and a world inset. No tiles are
+    # fetched, so exports work offline and in worker processes.
+    from geocoding import geocoder
+
+    half_lon = MAP_SPAN_DEGREES
+    # Equal distances along both axes at the centre latitude.
+    half_lat = half_lon * max(math.cos(math.radians(latitude)), 0.1) * height / width
+
+    def project(lat, lon):
+        dlon = (lon - longitude + 180) % 360 - 180
+        return x + (dlon + half_lon) / (2 * half_lon) * width, y + (latitude + half_lat - lat) / (2 * half_lat) * height
+
+    pdf.set_fill_color(236, 242, 247)
+    pdf.set_draw_color(150, 160, 170)
+    pdf.set_line_width(0.2)
+    pdf.rect(x, y, width, height, style="DF")
+
+    step = _nice_step(half_lon / 2)
+    pdf.set_draw_color(205, 213, 222)
+    pdf.set_font(pdf.body_family, size=6)
+    pdf.set_text_color(130, 140, 150)
+    lon = math.ceil((longitude - half_lon) / step) * step
+    while lon <= longitude + half_lon:
+        px, _ = project(latitude, lon)
+        pdf.line(px, y, px, y + height)
+        pdf.text(px + 0.8, y + height - 1.2, f"{(lon + 180) % 360 - 180:g}°")
+        lon += step
+    lat = math.ceil((latitude - half_lat) / step) * step
+    while lat <= latitude + half_lat:
+        _, py = project(lat, longitude)
+        pdf.line(x, py, x + width, py)
+        pdf.text(x + 1, py - 0.8, f"{lat:g}°")
+        lat += step
+
+    nearby = []
+    for place in geocoder.gazetteer.places():
+        px, py = project(place.latitude, place.longitude)
+        if x + 2 < px < x + width - 2 and y + 2 < py < y + height - 2:
+            if abs(place.latitude - latitude) > 0.05 or abs(place.longitude - longitude) > 0.05:
+                nearby.append((px, py, place.address.split(",")[0]))
+        if len(nearby) >= MAP_LABELS:
+            break
+    pdf.set_fill_color(110, 120, 130)
+    pdf.set_text_color(70, 80, 90)
+    pdf.set_font(pdf.body_family, size=6.5)
+    for px, py, name in nearby:
+        name = clean_text(pdf, name)
+        pdf.ellipse(px - 0.8, py - 0.8, 1.6, 1.6, style="F")
+        label_width = pdf.get_string_width(name)
+        # Labels that would run off the right edge go on the left of the dot.
+        pdf.text(px + 1.4 if px + 1.4 + label_width < x + width else px - 1.4 - label_width, py + 0.9, name)
+
+    cx, cy = project(latitude, longitude)
+    pdf.set_fill_color(200, 30, 45)
+    pdf.set_draw_color(255, 255, 255)
+    pdf.set_line_width(0.5)
+    pdf.ellipse(cx - 2, cy - 2, 4, 4, style="DF")
+    pdf.set_font(pdf.body_family, "B", 9)
+    pdf.set_text_color(150, 20, 30)
+    pdf.text(cx + 3, cy + 1.2, clean_text(pdf, f"{latitude:.3f}, {longitude:.3f}"))
+
+    km_per_mm = 2 * half_lon * 111.32 * math.cos(math.radians(latitude)) / width
+    km = _nice_step(max(km_per_mm * width / 4, 1e-3))
+    bar = km / km_per_mm
+    pdf.set_draw_color(40, 40, 40)
+    pdf.set_line_width(0.6)
+    pdf.line(x + 5, y + height - 6, x + 5 + bar, y + height - 6)
+    pdf.set_font(pdf.body_family, size=7)
+    pdf.set_text_color(40, 40, 40)
+    pdf.text(x + 5, y + height - 7.5, f"{km:g} km")
+
+    inset_w, inset_h = width * 0.22, width * 0.11
+    ix, iy = x + width - inset_w - 3, y + 3
+    pdf.set_line_width(0.2)
+    pdf.set_fill_color(255, 255, 255)
+    pdf.set_draw_color(150, 160, 170)
+    pdf.rect(ix, iy, inset_w, inset_h, style="DF")
+    pdf.set_draw_color(220, 225, 230)
+    for meridian in range(-150, 180, 30):
+        pdf.line(ix + (meridian + 180) / 360 * inset_w, iy, ix + (meridian + 180) / 360 * inset_w, iy + inset_h)
+    for parallel in range(-60, 90, 30):
+        pdf.line(ix, iy + (90 - parallel) / 180 * inset_h, ix + inset_w, iy + (90 - parallel) / 180 * inset_h)
+    pdf.set_fill_color(200, 30, 45)
+    dot_x = ix + (longitude + 180) / 360 * inset_w
+    dot_y = iy + (90 - latitude) / 180 * inset_h
+    pdf.ellipse(dot_x - 0.9, dot_y - 0.9, 1.8, 1.8, style="F")
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_line_width(0.2)
+
+
+def plan_pdf(destination, num_days, budget, currency, results, titles):
+    builder = PlanPdf(destination, num_days, budget, currency, [(key, titles.get(key, key)) for key in results])
+    for key, result in results.items():
+        builder.add(key, result)
+    return builder
+
+
+def export_record(record, titles, path):
+    builder = plan_pdf(record["destination"], record["num_days"], record["budget"], record["currency"], record["results"], titles)
+    builder.finish_into(path)
+    return path
+
+
+def export_plans(records, output_dir, titles, workers=None):
+    # Layout is CPU-bound, so bulk exports use processes rather than threads.
+    # Each worker keeps its own font template across the records it handles.
+    os.makedirs(output_dir, exist_ok=True)
+    # batch_cli appends a retried row after its earlier attempt, so the last
+    # record for a file name wins.
+    paths = {}
+    for record in records:
+        name = f"{slugify(record['destination'])}-{record['num_days']}d-{slugify(record['budget'])}-{record['id'][:8]}.pdf"
+        paths[name] = (record, os.path.join(output_dir, name))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(export_record, record, titles, path) for record, path in paths.values()]
+        for future in futures:
+            yield future.result()
+
+
+def main(argv=None):
+    import argparse
+
+    from batch_cli import read_rows
+
+    parser = argparse.ArgumentParser(description="Export plans generated by batch_cli.py to PDF.")
+    parser.add_argument("plans", help="JSONL file written by batch_cli.py")
+    parser.add_argument("-o", "--output-dir", default="exports", help="directory for the PDFs (default: exports)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    from travel_engine import SECTION_TITLES
+
+    # Latest successful attempt per row; failed ones are retried by batch_cli.
+    latest = {}
+    for record in read_rows(args.plans):
+        if "results" in record and "error" not in record:
+            latest[record["id"]] = record
+    records = list(latest.values())
+    started = time.perf_counter()
+    count = 0
+    for path in export_plans(records, args.output_dir, SECTION_TITLES, args.workers):
+        count += 1
+        print(f"[{count}/{len(records)}] {path}")
+    print(f"Exported {count} plans in {time.perf_counter() - started:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
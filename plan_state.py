@@ -0,0 +1,77 @@
+import os
+import time
+from collections import OrderedDict
+
+from section_executor import stream_sections
+
+# Finished sections kept per browser session. A section's entry is keyed by
+# its own inputs (accommodation by destination and budget, the exchange rate
+# by currency, ...), so changing one input only reruns the sections that use it.
+PLAN_STATE_ENTRIES = int(os.getenv("PLAN_STATE_ENTRIES", "128"))
+# Live data goes stale within a session; everything else is kept until the
+# session ends or falls out of the LRU.
+SECTION_MAX_AGE = {
+    "flights": 300,
+    "weather": 3600,
+    "exchange_rate": 3600,
+}
+
+
+def section_key(section):
+    return (section.key,) + tuple(section.args)
+
+
+class PlanState:
+    def __init__(self, max_entries=PLAN_STATE_ENTRIES):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+
+    def get(self, section):
+        key = section_key(section)
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        result, stored_at = entry
+        max_age = SECTION_MAX_AGE.get(section.key)
+        if max_age is not None and time.time() - stored_at > max_age:
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return result
+
+    def put(self, section, result):
+        key = section_key(section)
+        self._results[key] = (result, time.time())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def clear(self):
+        self._results.clear()
+
+    def stream(self, sections, executor=None):
+        # Same events as stream_sections: finished sections are replayed as
+        # done events straight away and only the rest are run. Failures
+        # (fetchers raise SectionError rather than returning error text) and
+        # timeouts aren't kept, so the next rerun tries them again.
+        missing = []
+        for i, section in enumerate(sections):
+            result = self.get(section)
+            if result is None:
+                missing.append(i)
+            else:
+                yield i, result, True
+        pending = [sections[i] for i in missing]
+        outcomes = {}
+        for j, text, done in stream_sections(pending, executor, outcomes):
+            if done and outcomes[j] == "ok" and text is not None:
+                self.put(pending[j], text)
+            yield missing[j], text, done
+
+
+def session_plan(session_state):
+    # One PlanState per browser session; Streamlit keeps session_state
+    # across reruns of the script.
+    if "plan_state" not in session_state:
+        session_state["plan_state"] = PlanState()
+    return session_state["plan_state"]
@@ -0,0 +1,207 @@
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import metrics
+from cache_store import CACHE_DB_PATH
+
+# Calls per second and burst per upstream, e.g. RATE_LIMITS="nominatim=1:1,serpapi=2:4".
+# Upstreams not listed aren't limited.
+UPSTREAM_RATES = {
+    "nominatim": (1.0, 1),
+    "serpapi": (5.0, 5),
+    "openai": (20.0, 40),
+    "openweathermap": (10.0, 20),
+    "exchangerate-api": (5.0, 10),
+    "aviationstack": (2.0, 5),
+}
+for item in filter(None, os.getenv("RATE_LIMITS", "").split(",")):
+    name, _, spec = item.partition("=")
+    rate, _, burst = spec.partition(":")
+    UPSTREAM_RATES[name.strip()] = (float(rate), int(burst or max(1, float(rate))))
+# With RATE_LIMIT_SHARED=1 the buckets live in SQLite, so every process on
+# the machine (several Streamlit servers, batch_cli) draws from one quota.
+RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "0") == "1"
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", CACHE_DB_PATH)
+# Both can be switched off at runtime, e.g. by the burst benchmark.
+RATE_LIMITING = os.getenv("RATE_LIMITING", "1") != "0"
+COALESCING = os.getenv("REQUEST_COALESCING", "1") != "0"
+
+# The report section a call is made for; Section.run sets it on its thread.
+# Work handed to pools runs in a copy of the caller's context, and the
+# geocoder worker passes the section explicitly.
+current_section = contextvars.ContextVar("current_section", default="other")
+
+
+class LocalBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        # Takes a token and returns 0, or returns how long until one is due.
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class SharedBucket:
+    # Same bucket, one row per upstream in SQLite. BEGIN IMMEDIATE takes the
+    # database write lock, so refill-and-take is atomic across processes.
+
+    def __init__(self, name, rate, burst, path=RATE_LIMIT_DB):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS rate_limits (upstream TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+        return self._db
+
+    def take(self):
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = db.execute("SELECT tokens, updated_at FROM rate_limits WHERE upstream = ?", (self.name,)).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+                if not wait:
+                    tokens -= 1
+                db.execute("INSERT OR REPLACE INTO rate_limits (upstream, tokens, updated_at) VALUES (?, ?, ?)", (self.name, tokens, now))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            return wait
+
+
+class Limiter:
+    # Hands out a bucket's tokens round-robin between sections, so a section
+    # firing twenty calls can't starve another one's single call. Waiters
+    # within a section are served in arrival order.
+
+    def __init__(self, upstream, bucket):
+        self.upstream = upstream
+        self.bucket = bucket
+        self._queues = {}
+        self._order = deque()
+        self._changed = threading.Condition()
+
+    def _head(self):
+        return self._queues[self._order[0]][0] if self._order else None
+
+    def _leave(self, section, ticket):
+        # The head rotates to the back of the line; anyone else (a waiter
+        # that failed) just drops out.
+        queue = self._queues[section]
+        at_head = self._head() is ticket
+        queue.remove(ticket)
+        if at_head:
+            self._order.popleft()
+            if queue:
+                self._order.append(section)
+        elif not queue:
+            self._order.remove(section)
+        if not queue:
+            del self._queues[section]
+        self._changed.notify_all()
+
+    def acquire(self, section=None):
+        section = section or current_section.get()
+        ticket = object()
+        started = time.perf_counter()
+        with self._changed:
+            if section not in self._queues:
+                self._queues[section] = deque()
+                self._order.append(section)
+            self._queues[section].append(ticket)
+            try:
+                while True:
+                    if self._head() is ticket:
+                        wait = self.bucket.take()
+                        if not wait:
+                            break
+                        self._changed.wait(wait)
+                    else:
+                        self._changed.wait()
+            finally:
+                self._leave(section, ticket)
+        metrics.rate_limit_wait.observe(time.perf_counter() - started, upstream=self.upstream)
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution: the first
+    # caller runs fn, the rest wait for its result (or exception).
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        if not COALESCING:
+            return fn()
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            metrics.coalesced_requests.inc(name=self.name)
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(upstream):
+    with _limiters_lock:
+        if upstream not in _limiters:
+            rate = UPSTREAM_RATES.get(upstream)
+            if rate is None:
+                _limiters[upstream] = None
+            else:
+                bucket = SharedBucket(upstream, *rate) if RATE_LIMIT_SHARED else LocalBucket(*rate)
+                _limiters[upstream] = Limiter(upstream, bucket)
+        return _limiters[upstream]
+
+
+def acquire(upstream, section=None):
+    # Blocks until the upstream's bucket has a token for this caller.
+    limiter = get_limiter(upstream) if RATE_LIMITING else None
+    if limiter is not None:
+        limiter.acquire(section)
@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+# Process-wide clients for the heavy third-party libraries. Each import
+# happens on first use, so a Streamlit rerun or a CLI start only pays for
+# the libraries its sections actually need, and every session shares the
+# same client afterwards.
+
+
+@lru_cache(maxsize=None)
+def load_environment():
+    import dotenv
+
+    dotenv.load_dotenv(override=True)
+
+
+@lru_cache(maxsize=None)
+def get_openai_client():
+    import openai
+
+    return openai.OpenAI()
+
+
+@lru_cache(maxsize=None)
+def get_nominatim(user_agent, domain=None, scheme=None):
+    from geopy.geocoders import Nominatim
+
+    options = {"domain": domain, "scheme": scheme}
+    return Nominatim(user_agent=user_agent, **{name: value for name, value in options.items() if value})
@@ -0,0 +1,116 @@
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from llm_streaming import run_timings
+from rate_limiter import current_section
+
+SECTION_MAX_WORKERS = int(os.getenv("SECTION_MAX_WORKERS", "16"))
+SECTION_TIMEOUT = float(os.getenv("SECTION_TIMEOUT", "60"))
+
+# One bounded pool for the whole process, so concurrent Streamlit sessions
+# share a fixed number of worker threads instead of spawning their own.
+_executor = ThreadPoolExecutor(max_workers=SECTION_MAX_WORKERS, thread_name_prefix="section")
+
+
+class SectionError(Exception):
+    # A fetcher that can't produce its section raises this; the message is
+    # shown as the section's text and the run counts as an error.
+    pass
+
+
+class Section:
+    def __init__(self, key, title, fn, *args, timeout=SECTION_TIMEOUT, streaming=False):
+        self.key = key
+        self.title = title
+        self.fn = fn
+        self.args = args
+        self.timeout = timeout
+        # Streaming sections get an on_chunk callback for partial output.
+        self.streaming = streaming
+        # "ok" or "error" once run() returns; None while running or timed out.
+        self.outcome = None
+        # First-token and total time of the LLM calls made by the last run.
+        self.timings = {}
+
+    def run(self, on_chunk=None):
+        started = time.perf_counter()
+        outcome = "ok"
+        # Rate limiters take turns between sections by this name.
+        token = current_section.set(self.key)
+        self.timings = {}
+        timings_token = run_timings.set(self.timings)
+        try:
+            if self.streaming and on_chunk is not None:
+                return self.fn(*self.args, on_chunk=on_chunk)
+            return self.fn(*self.args)
+        except SectionError as e:
+            outcome = "error"
+            return str(e)
+        except Exception as e:
+            outcome = "error"
+            return f"Error fetching {self.title}: {e}"
+        finally:
+            metrics.section_duration.observe(time.perf_counter() - started, section=self.key)
+            metrics.section_results.inc(section=self.key, outcome=outcome)
+            self.outcome = outcome
+            current_section.reset(token)
+            run_timings.reset(timings_token)
+
+
+def stream_sections(sections, executor=None, outcomes=None):
+    # Yields (index, text, done) events: partial text from streaming sections
+    # and exactly one done=True event per section, in completion order.
+    # Only the calling thread sees the events, so it can safely touch
+    # Streamlit placeholders that were laid out in display order. Pass a
+    # dict as `outcomes` to get each section's "ok", "error" or "timeout",
+    # filled in before its done event is yielded.
+    executor = executor or _executor
+    events = queue.Queue()
+
+    def run(i, section):
+        events.put((i, "start", None, None))
+        result = section.run(lambda text: events.put((i, "chunk", text, None)))
+        events.put((i, "done", result, section.outcome))
+
+    futures = {i: executor.submit(run, i, section) for i, section in enumerate(sections)}
+    # A section's clock starts when a worker picks it up, not while it
+    # waits for a free thread behind other sessions' sections.
+    deadlines = {}
+
+    while futures:
+        running = [deadlines[i] for i in futures if i in deadlines]
+        try:
+            i, kind, text, outcome = events.get(timeout=max(0, min(running) - time.monotonic()) if running else None)
+        except queue.Empty:
+            pass
+        else:
+            # Late events from a section that already timed out are dropped.
+            if i in futures:
+                if kind == "start":
+                    deadlines[i] = time.monotonic() + sections[i].timeout
+                elif kind == "chunk":
+                    yield i, text, False
+                else:
+                    del futures[i]
+                    if outcomes is not None:
+                        outcomes[i] = outcome
+                    yield i, text, True
+
+        now = time.monotonic()
+        for i in [i for i in futures if i in deadlines and deadlines[i] <= now]:
+            futures.pop(i).cancel()
+            # The run itself still lands in the histogram whenever it finishes.
+            metrics.section_results.inc(section=sections[i].key, outcome="timeout")
+            if outcomes is not None:
+                outcomes[i] = "timeout"
+            yield i, f"⏱️ {sections[i].title} timed out after {sections[i].timeout:g}s.", True
+
+
+def run_sections(sections, executor=None, outcomes=None):
+    # Yields (index, result) for every section as soon as it finishes.
+    for i, result, done in stream_sections(sections, executor, outcomes):
+        if done:
+            yield i, result
@@ -0,0 +1,102 @@
+import os
+import re
+import threading
+import zlib
+from collections import namedtuple
+
+from cache_store import cache_key
+from geocoding import geocoder, normalize_name
+
+# Cosine similarity above which a cached answer for the same place, model and
+# section is reused. Hashed trigram vectors of two prompts that differ by one
+# short word (say "low" vs "mid" budget) score about 0.92.
+SEMANTIC_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+EMBEDDING_DIM = 1024
+NGRAM = 3
+# Prompts remembered per (model, section, place).
+BUCKET_ENTRIES = 64
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+CanonicalPlace = namedtuple("CanonicalPlace", "id name")
+
+
+def canonical_place(destination):
+    # Free text -> a stable place ID and display name, from local data only.
+    # Unknown names are queued for the background geocoder, so the next
+    # request for them resolves; until then they aren't canonicalized.
+    name = normalize_name(destination or "")
+    if not name:
+        return None
+    place = geocoder.gazetteer.lookup(destination)
+    if place is None:
+        found, place = geocoder.lookup_local(destination, use_gazetteer=False)
+        if not found:
+            geocoder.submit(destination)
+            return None
+        if place is None:
+            return None
+    parts = [part.strip() for part in place.address.split(",")]
+    display = parts[0] if len(parts) == 1 else f"{parts[0]}, {parts[-1]}"
+    return CanonicalPlace(f"{place.latitude:.2f},{place.longitude:.2f}", display)
+
+
+def embed(text):
+    # Signed feature hashing of character trigrams: no model to load, and
+    # stable across processes, so vectors can be rebuilt from stored text.
+    import numpy as np
+
+    text = f" {text} "
+    grams = [text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)]
+    hashes = np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint32, count=len(grams))
+    vector = np.zeros(EMBEDDING_DIM)
+    np.add.at(vector, hashes % EMBEDDING_DIM, np.where(hashes & 0x80000000, -1.0, 1.0))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticIndex:
+    # Per-bucket lists of (prompt, cache key) stored in the response cache
+    # itself, so the index survives restarts with the answers it points at.
+    # Vectors are rebuilt in memory on first use of a bucket.
+
+    def __init__(self, cache, threshold=SEMANTIC_THRESHOLD, max_entries=BUCKET_ENTRIES):
+        self.cache = cache
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectors = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, bucket):
+        entries = self.cache.get(cache_key("semantic-index", bucket)) or []
+        # New prompts are appended, so length and last key identify a version.
+        version = (len(entries), entries[-1][1] if entries else None)
+        with self._lock:
+            cached = self._vectors.get(bucket)
+            if cached is not None and cached[0] == version:
+                return entries, cached[1]
+        import numpy as np
+
+        matrix = np.array([embed(prompt) for prompt, _ in entries]) if entries else np.zeros((0, EMBEDDING_DIM))
+        with self._lock:
+            self._vectors[bucket] = (version, matrix)
+        return entries, matrix
+
+    def lookup(self, bucket, prompt):
+        entries, matrix = self._bucket(bucket)
+        if not entries:
+            return None
+        scores = matrix @ embed(prompt)
+        numbers = NUMBER.findall(prompt)
+        # Best first; a near-identical prompt with different numbers (days,
+        # temperatures) is a different question.
+        for i in scores.argsort()[::-1]:
+            if scores[i] < self.threshold:
+                break
+            if NUMBER.findall(entries[i][0]) == numbers:
+                return entries[i][1]
+        return None
+
+    def add(self, bucket, prompt, key, ttl):
+        entries = [entry for entry in self.cache.get(cache_key("semantic-index", bucket)) or [] if entry[1] != key]
+        entries = (entries + [[prompt, key]])[-self.max_entries:]
+        self.cache.set(cache_key("semantic-index", bucket), entries, ttl)
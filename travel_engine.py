@@ -0,0 +1,222 @@
+import os
+
+import requests
+
+import metrics
+import rate_limiter
+from attractions import cached_attractions, search_attractions
+from combined_generation import CombinedGeneration
+from exchange_rates import ExchangeRateError, rate_table
+from flight_tracker import FLIGHT_CODE, FlightLookupError, flight_tracker, format_flight, parse_flight_codes
+from geocoding import geocoder
+from itinerary import build_itinerary
+from llm_cache import cached_completion
+from llm_streaming import collect_stream, stream_completion
+from resources import get_openai_client, load_environment
+from section_executor import Section, SectionError, run_sections
+from semantic_cache import canonical_place
+from weather_forecast import ForecastError, daily_summary, format_daily_summary, get_forecast, packing_weather_notes
+
+load_environment()
+metrics.start_exporters()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+SERP_API_KEY = os.getenv("SERP_API_KEY")
+WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+EXCHANGE_API_KEY = os.getenv("EXCHANGE_API_KEY")
+AVIATION_API_KEY = os.getenv("AVIATION_API_KEY")
+
+# Every section a plan can contain, in display order. "map" is the geocode
+# behind the interactive map.
+SECTION_TITLES = {
+    "accommodation": "🏨 Accommodation Suggestions",
+    "weather": "🌦️ Real-Time Weather Forecast",
+    "cuisine": "🍽️ Local Cuisine",
+    "exchange_rate": "💱 Currency Exchange",
+    "transport": "🚕 Transport Options",
+    "emergency_info": "🏥 Emergency Contacts",
+    "shopping": "🛍️ Shopping & Souvenirs Guide",
+    "packing_list": "🎒 Smart Packing List",
+    "local_phrases": "🔊 Basic Local Language Phrases",
+    "places": "📍 Top Places to Visit",
+    "flights": "🛩️ Real-Time Flight Tracker",
+    "map": "🗺️ Interactive Map",
+}
+SECTION_KEYS = list(SECTION_TITLES)
+
+
+def missing_api_keys():
+    keys = {"OPENAI_API_KEY": OPENAI_API_KEY, "SERP_API_KEY": SERP_API_KEY, "WEATHER_API_KEY": WEATHER_API_KEY, "EXCHANGE_API_KEY": EXCHANGE_API_KEY}
+    return [name for name, value in keys.items() if not value]
+
+
+def get_client():
+    return get_openai_client()
+
+
+def get_places_to_visit(destination):
+    try:
+        places = search_attractions(destination)
+        if not places:
+            return "No places found."
+        return "\n".join([f"- [{place['title']}]({place['link']})" for place in places])
+    except Exception as e:
+        raise SectionError(f"Error fetching places: {e}") from e
+
+def get_itinerary(destination, num_days, center=None):
+    # Reuses the places section's cached search; None when there is none,
+    # so a failed or still-running search isn't repeated on every rerun.
+    attractions = cached_attractions(destination)
+    if attractions is None:
+        return None
+    return build_itinerary(destination, num_days, attractions, center)
+
+def get_currency_exchange_rate(base_currency, target_currency):
+    try:
+        return round(rate_table.rate(base_currency, target_currency), 6)
+    except KeyError:
+        return "Currency Not Found."
+    except ExchangeRateError as e:
+        raise SectionError(f"API Error: {e}") from e
+    except requests.exceptions.RequestException as e:
+        raise SectionError(f"API Request Failed: {e}") from e
+
+def get_exchange_rate_summary(currency, target_currency="INR"):
+    return f"1 {currency} = {get_currency_exchange_rate(currency, target_currency)} {target_currency}"
+
+def fetch_openai_response(prompt, model="gpt-4o-mini", section=None, on_chunk=None, destination=None):
+    # Spelling variants of a known place ("paris", "Paris, FR") are asked
+    # about under one canonical name, so they share cached answers.
+    place = canonical_place(destination) if destination else None
+    if place is not None:
+        prompt = prompt.replace(destination, place.name)
+
+    def complete():
+        if on_chunk is not None:
+            return collect_stream(stream_completion(get_client(), prompt, model, section), on_chunk)
+        rate_limiter.acquire("openai")
+        with metrics.span(metrics.llm_duration, model=model):
+            response = get_client().chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}]
+            )
+        metrics.record_llm_usage(model, section, response.usage)
+        return response.choices[0].message.content
+    return cached_completion(prompt, model, section, complete, place_id=place.id if place else None)
+
+def get_transport_info(destination, on_chunk=None):
+    return fetch_openai_response(f"Provide public transport and taxi options in {destination}.", section="transport", on_chunk=on_chunk, destination=destination)
+
+def get_emergency_info(destination, on_chunk=None):
+    return fetch_openai_response(f"List emergency contacts (hospitals, embassies, police) in {destination}.", "gpt-4-turbo", "emergency_info", on_chunk=on_chunk, destination=destination)
+
+def get_accommodation(destination, budget, on_chunk=None):
+    return fetch_openai_response(f"List best {budget}-budget hotels and stays in {destination}.", section="accommodation", on_chunk=on_chunk, destination=destination)
+
+def get_shopping_guide(destination, on_chunk=None):
+    return fetch_openai_response(f"Provide famous shopping places and souvenirs in {destination}.", section="shopping", on_chunk=on_chunk, destination=destination)
+
+def get_packing_list(destination, num_days, on_chunk=None):
+    prompt = f"Generate a packing list for a {num_days}-day trip to {destination} considering weather and activities."
+    try:
+        notes = packing_weather_notes(get_destination_forecast(destination))
+    except Exception:
+        # Without a forecast the model falls back on typical weather.
+        notes = ""
+    if notes:
+        prompt += f" {notes}"
+    return fetch_openai_response(prompt, section="packing_list", on_chunk=on_chunk, destination=destination)
+
+def get_local_phrases(destination, on_chunk=None):
+    return fetch_openai_response(f"Provide essential travel phrases in the local language of {destination}.", section="local_phrases", on_chunk=on_chunk, destination=destination)
+
+def get_cuisine_info(destination):
+    return "Cuisine Recommendations Here"
+
+def get_flight_info(flight_codes):
+    codes = parse_flight_codes(flight_codes)
+    if not codes:
+        return "Enter one or more flight IATA codes (e.g., AI101, BA142)."
+    invalid = [code for code in codes if not FLIGHT_CODE.match(code)]
+    codes = [code for code in codes if code not in invalid]
+    try:
+        flight_tracker.track(codes)
+        flights = flight_tracker.lookup(codes)
+    except FlightLookupError as e:
+        raise SectionError(str(e)) from e
+    except requests.exceptions.RequestException as e:
+        raise SectionError(f"API Request Failed: {e}") from e
+
+    blocks = []
+    for code in codes:
+        if flights[code]:
+            blocks.append(f"**{code}**\n\n{format_flight(flights[code])}")
+        else:
+            blocks.append(f"**{code}**\n\nFlight information not available. Please check the flight code.")
+    blocks += [f"**{code}**\n\nNot a valid flight IATA code." for code in invalid]
+    return "\n\n".join(blocks)
+
+def get_destination_forecast(destination):
+    # Never waits on Nominatim: an unknown destination is looked up in the
+    # background and OpenWeatherMap resolves the name meanwhile.
+    place = geocoder.geocode_cached(destination)
+    if place:
+        forecast = get_forecast(place.latitude, place.longitude)
+    else:
+        forecast = get_forecast(query=destination)
+    return daily_summary(forecast)
+
+def get_weather_info(destination, num_days=None):
+    try:
+        days = get_destination_forecast(destination)
+    except ForecastError as e:
+        raise SectionError(f"Weather data not available: {e}") from e
+    except requests.exceptions.RequestException as e:
+        raise SectionError(f"API Request Failed: {e}") from e
+    if not days:
+        raise SectionError("Weather data not available: Empty forecast.")
+    return format_daily_summary(days, num_days)
+
+
+def build_sections(destination, num_days, budget, currency="USD", keys=SECTION_KEYS, combined=False, flight_codes=""):
+    fetchers = {
+        "accommodation": (get_accommodation, (destination, budget), True),
+        "weather": (get_weather_info, (destination, num_days), False),
+        "cuisine": (get_cuisine_info, (destination,), False),
+        "exchange_rate": (get_exchange_rate_summary, (currency,), False),
+        "transport": (get_transport_info, (destination,), True),
+        "emergency_info": (get_emergency_info, (destination,), True),
+        "shopping": (get_shopping_guide, (destination,), True),
+        "packing_list": (get_packing_list, (destination, num_days), True),
+        "local_phrases": (get_local_phrases, (destination,), True),
+        "places": (get_places_to_visit, (destination,), False),
+        "flights": (get_flight_info, (flight_codes,), False),
+        "map": (geocoder.geocode, (destination,), False),
+    }
+    sections = []
+    for key in SECTION_KEYS:
+        if key in keys:
+            fn, args, streaming = fetchers[key]
+            sections.append(Section(key, SECTION_TITLES[key], fn, *args, streaming=streaming))
+
+    if combined:
+        # One structured completion for every LLM section; anything it
+        # misses falls back to that section's own fetcher.
+        fallbacks = {section.key: section.fn for section in sections}
+        generation = CombinedGeneration(get_client(), destination, list(fallbacks), num_days, budget, fallbacks)
+        for section in sections:
+            if section.key in generation.sections:
+                section.fn = lambda *args, key=section.key: generation.get(key, *args)
+                section.streaming = False
+    return sections
+
+
+def generate_plan(destination, num_days, budget, currency="USD", sections=SECTION_KEYS, combined=False, flight_codes=""):
+    # Returns the results and each section's outcome: "ok", "error", or
+    # "timeout". Failed sections still have their message as the result.
+    built = build_sections(destination, num_days, budget, currency, sections, combined, flight_codes)
+    results, outcomes = {}, {}
+    for i, result in run_sections(built, outcomes=outcomes):
+        if built[i].key == "map" and result is not None and not isinstance(result, str):
+            result = result._asdict()
+        results[built[i].key] = result
+    return {section.key: results[section.key] for section in built}, {section.key: outcomes[i] for i, section in enumerate(built)}
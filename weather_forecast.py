@@ -0,0 +1,149 @@
+import os
+import time
+
+import http_client
+from cache_store import TieredCache
+
+OPENWEATHER_API_URL = os.getenv("OPENWEATHER_API_URL", "http://api.openweathermap.org/data/2.5")
+# Forecasts are cached per grid cell, so nearby destinations share a fetch.
+FORECAST_GRID_DEGREES = float(os.getenv("FORECAST_GRID_DEGREES", "0.25"))
+# OpenWeatherMap refreshes the 5-day/3-hour forecast about every three hours.
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "10800"))
+
+forecast_cache = TieredCache("forecasts", default_ttl=FORECAST_CACHE_TTL)
+
+
+class ForecastError(Exception):
+    pass
+
+
+def grid_cell(latitude, longitude):
+    return (
+        round(round(latitude / FORECAST_GRID_DEGREES) * FORECAST_GRID_DEGREES, 4),
+        round(round(longitude / FORECAST_GRID_DEGREES) * FORECAST_GRID_DEGREES, 4),
+    )
+
+
+def fetch_forecast(**location):
+    params = {"appid": os.getenv("WEATHER_API_KEY"), "units": "metric", **location}
+    response = http_client.get(f"{OPENWEATHER_API_URL}/forecast", params=params, upstream="openweathermap")
+    data = response.json()
+    if response.status_code != 200 or "list" not in data:
+        raise ForecastError(data.get("message", "Unknown error"))
+    # Keep only what the daily aggregation needs, as parallel columns.
+    readings = data["list"]
+    return {
+        "city": (data.get("city") or {}).get("name", ""),
+        "coord": (data.get("city") or {}).get("coord", {}),
+        "timezone": (data.get("city") or {}).get("timezone", 0),
+        "dt": [reading["dt"] for reading in readings],
+        "temp_min": [reading["main"]["temp_min"] for reading in readings],
+        "temp_max": [reading["main"]["temp_max"] for reading in readings],
+        "humidity": [reading["main"]["humidity"] for reading in readings],
+        "wind": [(reading.get("wind") or {}).get("speed", 0.0) for reading in readings],
+        "pop": [reading.get("pop", 0.0) for reading in readings],
+        "precipitation": [
+            (reading.get("rain") or {}).get("3h", 0.0) + (reading.get("snow") or {}).get("3h", 0.0)
+            for reading in readings
+        ],
+        "condition": [reading["weather"][0]["main"] if reading.get("weather") else "Unknown" for reading in readings],
+    }
+
+
+def get_forecast(latitude=None, longitude=None, query=None):
+    if latitude is not None and longitude is not None:
+        cell = grid_cell(latitude, longitude)
+        key = f"{cell[0]},{cell[1]}"
+        forecast = forecast_cache.get(key)
+        if forecast is None:
+            forecast = fetch_forecast(lat=cell[0], lon=cell[1])
+            forecast_cache.set(key, forecast)
+        return forecast
+
+    # Names OpenWeatherMap resolves itself are cached by the name too.
+    key = f"q:{' '.join(query.casefold().split())}"
+    forecast = forecast_cache.get(key)
+    if forecast is not None:
+        return forecast
+    forecast = fetch_forecast(q=query)
+    forecast_cache.set(key, forecast)
+    coord = forecast["coord"]
+    if "lat" in coord and "lon" in coord:
+        cell = grid_cell(coord["lat"], coord["lon"])
+        forecast_cache.set(f"{cell[0]},{cell[1]}", forecast)
+    return forecast
+
+
+def daily_summary(forecast):
+    import numpy as np
+
+    dt = np.asarray(forecast["dt"], dtype=np.int64)
+    if dt.size == 0:
+        return []
+    order = np.argsort(dt, kind="stable")
+    dt = dt[order]
+    local_day = (dt + forecast["timezone"]) // 86400
+    # Readings are sorted, so each day is one contiguous run starting at `starts`.
+    days, starts, day_index = np.unique(local_day, return_index=True, return_inverse=True)
+
+    def column(name, dtype=np.float64):
+        return np.asarray(forecast[name], dtype=dtype)[order]
+
+    temp_min = np.minimum.reduceat(column("temp_min"), starts)
+    temp_max = np.maximum.reduceat(column("temp_max"), starts)
+    precipitation = np.add.reduceat(column("precipitation"), starts)
+    pop = np.maximum.reduceat(column("pop"), starts)
+    wind = np.maximum.reduceat(column("wind"), starts)
+    humidity = np.add.reduceat(column("humidity"), starts) / np.diff(np.append(starts, dt.size))
+
+    # Most frequent condition per day via a day x condition count matrix.
+    conditions, condition_index = np.unique(np.asarray(forecast["condition"])[order], return_inverse=True)
+    counts = np.zeros((days.size, conditions.size), dtype=np.int64)
+    np.add.at(counts, (day_index, condition_index), 1)
+    condition = conditions[counts.argmax(axis=1)]
+
+    return [
+        {
+            "date": time.strftime("%Y-%m-%d", time.gmtime(int(days[i]) * 86400)),
+            "temp_min": round(float(temp_min[i]), 1),
+            "temp_max": round(float(temp_max[i]), 1),
+            "precipitation": round(float(precipitation[i]), 1),
+            "pop": round(float(pop[i]), 2),
+            "wind_max": round(float(wind[i]), 1),
+            "humidity": round(float(humidity[i])),
+            "condition": str(condition[i]),
+        }
+        for i in range(days.size)
+    ]
+
+
+def format_daily_summary(days, num_days=None):
+    lines = [
+        "| Date | Min | Max | Precipitation | Chance | Wind | Condition |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for day in days:
+        lines.append(
+            f"| {day['date']} | {day['temp_min']}°C | {day['temp_max']}°C | {day['precipitation']} mm "
+            f"| {day['pop']:.0%} | {day['wind_max']} m/s | {day['condition']} |"
+        )
+    if num_days and num_days > len(days):
+        lines.append(f"\nForecasts only reach {len(days)} days ahead; the remaining {num_days - len(days)} days of the trip aren't covered yet.")
+    return "\n".join(lines)
+
+
+def packing_weather_notes(days):
+    # A compact, rounded digest for the packing-list prompt. Rounding keeps
+    # the prompt (and so its cache key) stable between forecast refreshes.
+    if not days:
+        return ""
+    low = min(day["temp_min"] for day in days)
+    high = max(day["temp_max"] for day in days)
+    rain = sum(day["precipitation"] for day in days)
+    wet_days = sum(1 for day in days if day["pop"] >= 0.5)
+    conditions = sorted({day["condition"] for day in days})
+    return (
+        f"Forecast for the next {len(days)} days: {round(low)}–{round(high)}°C, "
+        f"about {round(rain)} mm of precipitation over {wet_days} likely-wet days, "
+        f"conditions: {', '.join(conditions)}."
+    )